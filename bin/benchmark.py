@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the detectors on synthetic corpora.
+
+The corpora are generated from a fixed seed, so two runs with the same
+--seed and --scale check exactly the same files. For each detector type
+this measures its construction time, the files/s and MB/s of each corpus,
+the peak memory allocated by Python while building it and scanning every
+corpus, and the cold start time of the command line. The directory walk is
+measured on its own, on a tree of empty files.
+
+  bin/benchmark.py --output results.json
+  bin/benchmark.py --baseline results.json --max-regression 0.25
+
+With --baseline the run fails if any measure is worse than the stored one
+by more than --max-regression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+CLI = ROOT / "src" / "misspelling_lib" / "misspellings.py"
+sys.path.append(str(ROOT / "src"))
+
+from misspelling_lib import MisspellingFactory  # noqa: E402
+from misspelling_lib.misspelling_detector import PACKAGED_INDEX  # noqa: E402
+from misspelling_lib.utils import MisspellingIndex, expand_directories  # noqa: E402
+
+RESULTS_VERSION = 1
+# Threads listing the directories of the walked tree, 0 is the default walk.
+WALK_THREADS = [0, 4]
+# Share of the generated words that are misspelled.
+MISSPELLING_RATE = 0.02
+DETECTORS = ["misspelling_detector", "misspelling_file_detector", "misspelling_json_detector"]
+
+Vocabulary = Tuple[List[str], List[str]]
+
+
+def load_vocabulary() -> Vocabulary:
+    """Return the correct and the misspelled words of the default dictionary, in a stable order."""
+    index = MisspellingIndex.open(PACKAGED_INDEX)
+    misspelled = sorted(word for word in index if word.isalpha())
+    correct = sorted({word for corrections in index.values() for word in corrections if word.isalpha()})
+    return correct, misspelled
+
+
+def _word(rng: random.Random, vocabulary: Vocabulary) -> str:
+    correct, misspelled = vocabulary
+    return rng.choice(misspelled if rng.random() < MISSPELLING_RATE else correct)
+
+
+def _prose_line(rng: random.Random, vocabulary: Vocabulary, words: int) -> str:
+    return " ".join(_word(rng, vocabulary) for _ in range(words))
+
+
+def _code_line(rng: random.Random, vocabulary: Vocabulary) -> str:
+    identifiers = [
+        _word(rng, vocabulary) + "".join(_word(rng, vocabulary).capitalize() for _ in range(rng.randint(1, 3)))
+        for _ in range(3)
+    ]
+    return "    {} = self.{}({}, {!r})".format(identifiers[0], identifiers[1], identifiers[2], rng.randint(0, 999))
+
+
+def _small_files(rng: random.Random, vocabulary: Vocabulary, scale: float) -> Iterator[Tuple[str, str]]:
+    for number in range(max(1, int(2000 * scale))):
+        lines = [_prose_line(rng, vocabulary, rng.randint(4, 12)) for _ in range(rng.randint(10, 60))]
+        yield f"dir{number % 20:02}/file{number:05}.txt", "\n".join(lines) + "\n"
+
+
+def _huge_files(rng: random.Random, vocabulary: Vocabulary, scale: float) -> Iterator[Tuple[str, str]]:
+    for number in range(2):
+        lines = [_prose_line(rng, vocabulary, 12) for _ in range(max(1, int(200000 * scale)))]
+        yield f"huge{number}.txt", "\n".join(lines) + "\n"
+
+
+def _long_lines(rng: random.Random, vocabulary: Vocabulary, scale: float) -> Iterator[Tuple[str, str]]:
+    for number in range(4):
+        yield f"line{number}.txt", _prose_line(rng, vocabulary, max(1, int(150000 * scale))) + "\n"
+
+
+def _camel_case(rng: random.Random, vocabulary: Vocabulary, scale: float) -> Iterator[Tuple[str, str]]:
+    for number in range(max(1, int(200 * scale))):
+        lines = [_code_line(rng, vocabulary) for _ in range(rng.randint(100, 300))]
+        yield f"module{number:04}.py", "def run(self):\n" + "\n".join(lines) + "\n"
+
+
+CORPORA: Dict[str, Callable[[random.Random, Vocabulary, float], Iterator[Tuple[str, str]]]] = {
+    "small_files": _small_files,
+    "huge_files": _huge_files,
+    "long_lines": _long_lines,
+    "camel_case": _camel_case,
+}
+
+
+def generate_corpora(corpus_dir: Path, seed: int, scale: float, vocabulary: Vocabulary) -> Dict[str, List[Path]]:
+    """Write every corpus under corpus_dir, unless it holds the corpora of the same seed and scale already."""
+    stamp = corpus_dir / "corpora.json"
+    settings = {"seed": seed, "scale": scale, "version": RESULTS_VERSION}
+    try:
+        reuse = json.loads(stamp.read_text(encoding="utf-8")) == settings
+    except (IOError, ValueError):
+        reuse = False
+
+    corpora = {}
+    for name, generator in CORPORA.items():
+        rng = random.Random(f"{seed}-{name}")
+        corpora[name] = []
+        for relative_path, content in generator(rng, vocabulary, scale):
+            path = corpus_dir / name / relative_path
+            if not reuse:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(content, encoding="utf-8")
+            corpora[name].append(path)
+    stamp.write_text(json.dumps(settings), encoding="utf-8")
+    return corpora
+
+
+def generate_tree(corpus_dir: Path, scale: float) -> Path:
+    """Create a deep tree of empty files under corpus_dir, for the directory walk alone."""
+    root = corpus_dir / "tree"
+    stamp = corpus_dir / "tree.json"
+    if stamp.exists() and json.loads(stamp.read_text(encoding="utf-8")) == {"scale": scale}:
+        return root
+    for number in range(max(1, int(4000 * scale))):
+        directory = root / f"d{number % 20:02}" / f"e{number // 20 % 20:02}" / f"f{number:05}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for file_number in range(25):
+            (directory / f"file{file_number:02}.c").touch()
+    stamp.write_text(json.dumps({"scale": scale}), encoding="utf-8")
+    return root
+
+
+def benchmark_walk(root: Path, args: argparse.Namespace) -> dict:
+    """Measure the files/s listed by expand_directories() for each number of WALK_THREADS."""
+    results = {}
+    for threads in WALK_THREADS:
+        files = sum(1 for _ in expand_directories([root], threads=threads))
+        seconds = _best_time(lambda: sum(1 for _ in expand_directories([root], threads=threads)), args.repeat)
+        results[f"threads_{threads}"] = {"files": files, "seconds": seconds, "files_per_second": files / seconds}
+    return results
+
+
+def write_dictionaries(corpus_dir: Path) -> Dict[str, Dict[str, Path]]:
+    """Write the default dictionary in the formats of the file and json detectors."""
+    index = MisspellingIndex.open(PACKAGED_INDEX)
+    text_file = corpus_dir / "misspellings.txt"
+    json_file = corpus_dir / "misspellings.json"
+    with open(text_file, "w", encoding="utf-8") as f:
+        for bad_word in sorted(index):
+            for correction in index[bad_word]:
+                f.write(f"{bad_word} {correction}\n")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(index.items())), f, ensure_ascii=False)
+    return {
+        "misspelling_detector": {},
+        "misspelling_file_detector": {"misspelling_file": text_file},
+        "misspelling_json_detector": {"misspelling_file": json_file},
+    }
+
+
+def _build(name: str, kwargs: Dict[str, Path], engine: str):
+    detector = MisspellingFactory.factory(misspelling_detector_name=name, engine=engine, **kwargs)
+    # The corpora are generated, none of them is to be skipped as such.
+    detector.check_generated_files()
+    return detector
+
+
+def _scan(detector, filenames: List[Path], jobs: int) -> int:
+    found = 0
+    for _, errors, results in detector.check_many(filenames, jobs=jobs):
+        found += sum(1 for _ in results)
+        if errors:
+            raise errors[0]
+    return found
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _cli_args(kwargs: Dict[str, Path]) -> List[str]:
+    if "misspelling_file" not in kwargs:
+        return []
+    flag = "--json-file" if kwargs["misspelling_file"].suffix == ".json" else "--misspelling-file"
+    return [flag, str(kwargs["misspelling_file"])]
+
+
+def benchmark_detector(
+    name: str, kwargs: Dict[str, Path], corpora: Dict[str, List[Path]], args: argparse.Namespace
+) -> dict:
+    construct_seconds = _best_time(lambda: _build(name, kwargs, args.engine), args.repeat)
+
+    corpus_results = {}
+    for corpus, filenames in corpora.items():
+        size = sum(os.path.getsize(filename) for filename in filenames)
+        detector = _build(name, kwargs, args.engine)
+        # Also a warm-up run, which leaves the lazy compilation of the matcher out of the scan times.
+        misspellings = _scan(detector, filenames, args.jobs)
+        if not misspellings:
+            raise RuntimeError(f"No misspelling found in the {corpus} corpus, its files weren't checked.")
+        seconds = _best_time(lambda: _scan(detector, filenames, args.jobs), args.repeat)
+        corpus_results[corpus] = {
+            "files": len(filenames),
+            "bytes": size,
+            "misspellings": misspellings,
+            "seconds": seconds,
+            "files_per_second": len(filenames) / seconds,
+            "mb_per_second": size / seconds / 1024 / 1024,
+        }
+
+    tracemalloc.start()
+    try:
+        detector = _build(name, kwargs, args.engine)
+        for filenames in corpora.values():
+            _scan(detector, filenames, 1)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tiny_file = corpora["small_files"][0]
+    command = [sys.executable, str(CLI), "--engine", args.engine, *_cli_args(kwargs), str(tiny_file)]
+    cli_start_seconds = _best_time(lambda: subprocess.run(command, stdout=subprocess.DEVNULL), args.repeat)
+
+    return {
+        "construct_seconds": construct_seconds,
+        "cli_start_seconds": cli_start_seconds,
+        "peak_memory_bytes": peak_memory,
+        "corpora": corpus_results,
+    }
+
+
+def _flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[prefix + key] = value
+    return flat
+
+
+def find_regressions(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return a description of each measure worse than in the baseline by more than max_regression."""
+    current = _flatten({"detectors": results["detectors"], "walk": results.get("walk", {})})
+    regressions = []
+    expected_results = {"detectors": baseline["detectors"], "walk": baseline.get("walk", {})}
+    for key, expected in sorted(_flatten(expected_results).items()):
+        if key not in current or not expected or key.endswith((".files", ".bytes", ".misspellings", ".seconds")):
+            continue
+        measured = current[key]
+        if key.endswith("_per_second"):
+            change = (expected - measured) / expected
+        else:
+            change = (measured - expected) / expected
+        if change > max_regression:
+            regressions.append(f"{key}: {measured:.4g} against {expected:.4g} ({change:+.0%})")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated corpora.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size of the corpora, 0.1 for a quick run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Times each measure is taken, the best one is kept.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of processes scanning the corpora.")
+    parser.add_argument("--engine", default="tokenizer", help="Matching engine of the detectors.")
+    parser.add_argument("--detector", action="append", choices=DETECTORS, help="Only benchmark these detectors.")
+    parser.add_argument("--corpus-dir", type=Path, help="Keep the corpora there to reuse them on the next run.")
+    parser.add_argument("--output", type=Path, help="Write the results there as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Results of a previous run to compare with.")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.25, help="Fail when a measure is this much worse than the baseline."
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline["seed"], baseline["scale"]) != (args.seed, args.scale):
+            print(f"The baseline was measured with --seed {baseline['seed']} --scale {baseline['scale']}.")
+            return 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = args.corpus_dir or Path(tmp_dir)
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        corpora = generate_corpora(corpus_dir, args.seed, args.scale, load_vocabulary())
+        dictionaries = write_dictionaries(corpus_dir)
+
+        results = {
+            "version": RESULTS_VERSION,
+            "seed": args.seed,
+            "scale": args.scale,
+            "engine": args.engine,
+            "jobs": args.jobs,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "detectors": {},
+        }
+        for name in args.detector or DETECTORS:
+            detector_results = benchmark_detector(name, dictionaries[name], corpora, args)
+            results["detectors"][name] = detector_results
+            print(
+                f"{name}: built in {detector_results['construct_seconds'] * 1000:.1f} ms,"
+                f" CLI start {detector_results['cli_start_seconds'] * 1000:.0f} ms,"
+                f" peak memory {detector_results['peak_memory_bytes'] / 1024 / 1024:.1f} MB"
+            )
+            for corpus, measures in detector_results["corpora"].items():
+                print(
+                    f"  {corpus}: {measures['files_per_second']:.0f} files/s,"
+                    f" {measures['mb_per_second']:.2f} MB/s, {measures['misspellings']} misspellings"
+                )
+
+        results["walk"] = benchmark_walk(generate_tree(corpus_dir, args.scale), args)
+        for threads, measures in results["walk"].items():
+            print(f"walk {threads}: {measures['files_per_second']:.0f} files/s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,3 +18,6 @@ url='https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_ma
 } > "$json_filename"
 
 $repository_root/format_misspelling_file_into_json.py "$json_filename"
+$repository_root/format_misspelling_file_into_json.py --compile \
+  "$repository_root/../src/misspelling_lib/indexes/default.msidx" \
+  "$repository_root"/../src/misspelling_lib/json_sources/*.json
@@ -3,6 +3,9 @@
 import json
 import sys
 from collections import OrderedDict
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
 
 def convert_into_json():
@@ -35,5 +38,18 @@ def convert_into_json():
         json.dump(ordered_dict, wikipedia_file, ensure_ascii=False, indent=2)
 
 
+def compile_into_index():
+    """Compile JSON, text or Wikipedia formatted files into a binary index: --compile OUTPUT SOURCE..."""
+    from misspelling_lib.utils.index import compile_index
+
+    if len(sys.argv) < 4:
+        print("Usage: --compile OUTPUT SOURCE...")
+        sys.exit(1)
+    print(compile_index(sources=sys.argv[3:], output=sys.argv[2]))
+
+
 if __name__ == "__main__":
-    convert_into_json()
+    if len(sys.argv) > 1 and sys.argv[1] == "--compile":
+        compile_into_index()
+    else:
+        convert_into_json()
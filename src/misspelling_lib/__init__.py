@@ -1,7 +1,14 @@
-from .misspelling_detector import MisspellingDetector
-from .misspelling_factory import MisspellingFactory
-from .misspelling_file_detector import MisspellingFileDetector
-from .misspelling_json_detector import MisspellingJSONDetector
+from importlib import import_module
+from typing import Any
+
+# The detectors are only imported once they're used, so importing the package
+# stays cheap for tools that only need one of them.
+_LAZY_IMPORTS = {
+    "MisspellingDetector": ".misspelling_detector",
+    "MisspellingFactory": ".misspelling_factory",
+    "MisspellingFileDetector": ".misspelling_file_detector",
+    "MisspellingJSONDetector": ".misspelling_json_detector",
+}
 
 __all__ = [
     "MisspellingDetector",
@@ -9,3 +16,15 @@ __all__ = [
     "MisspellingFileDetector",
     "MisspellingJSONDetector",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,43 +1,778 @@
+import collections
+import io
+import mmap
 import os
 import pathlib
+import re
 import sys
+import time
 from codecs import StreamWriter
-from typing import Iterator, List, TextIO, Tuple, Union
-
-from tap.tap import TapType
+from sys import intern
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from .misspelling_interface import IMisspellingChecker
-from .utils import esc_file, esc_sed, same_case, split_words
+from .utils import (
+    MATCHING_ENGINES,
+    FileLimitExceeded,
+    Misspelling,
+    MisspellingLookup,
+    SedScriptSink,
+    TextSink,
+    sniff,
+    sniff_name,
+)
+from .utils.sniff import GENERATED, SNIFF_SIZE
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from tap.tap import TapType
+
+    from .utils.cache import ScanCache
+    from .utils.extractors import Extractor
+    from .utils.git import ChangedFile
+    from .utils.sinks import ResultSink
+    from .utils.stats import CheckHooks, FileStats
+
+# Files at least this big are memory-mapped and searched as bytes, this many
+# bytes at a time.
+MMAP_MIN_SIZE = 1024 * 1024
+MMAP_BLOCK_SIZE = 256 * 1024
+# Distinct runs of letters whose result a mapped scan remembers, so its memory
+# stays flat however many there are.
+MMAP_RUN_MEMO_SIZE = 1 << 16
+_NEWLINE_REGEX = re.compile(b"\n")
+# Runs of ASCII letters and of anything that isn't ASCII, which are the only
+# bytes that can be part of a word.
+_RUN_REGEX = re.compile(b"(?:[A-Za-z]|[\x80-\xff])+")
+# Universal newlines also end a line on a lone "\r", which the bytes path doesn't.
+_LONE_CR_REGEX = re.compile(b"\r(?!\n)")
+
+# Same line endings as a file opened in text mode, unlike str.splitlines().
+_TEXT_LINE_REGEX = re.compile(r"\r\n|\r|\n")
+# Distinct lines whose matches are remembered by check_many_texts().
+TEXT_MEMO_SIZE = 65536
+
+# Files are handed to the worker processes in batches whose total size is
+# roughly this many bytes, so a large tree of small files doesn't pay one
+# round trip per file while big files still get a worker of their own.
+BATCH_SIZE_BYTES = 1024 * 1024
+BATCH_MAX_FILES = 256
+
+# The time limit of a file is checked every this many lines.
+TIMEOUT_CHECK_LINES = 256
+# Letters at the end of a truncated line, part of a word cut in two.
+_CUT_WORD_REGEX = re.compile(r"[^\W\d_]+\Z")
+
+_worker_checker: Optional["MisspellingChecker"] = None
+
+
+def _init_worker(checker: "MisspellingChecker") -> None:
+    """Keep the checker in the worker process so it's only transferred once."""
+    global _worker_checker
+    if checker._hooks is not None:
+        from .utils.stats import HookRecorder
+
+        # The events are sent back along with the results.
+        checker._hooks = HookRecorder()
+    _worker_checker = checker
+
+
+def _check_batch_in_worker(
+    filenames: List[pathlib.Path],
+) -> List[Tuple[List[Exception], List[Misspelling], Optional[list]]]:
+    batch = []
+    for filename in filenames:
+        errors, results = _worker_checker.check(filename)
+        hooks = _worker_checker._hooks
+        batch.append((errors, results, hooks.pop_events() if hooks is not None else None))
+    return batch
+
+
+def _extracted_lines(extractor: "Extractor", read: Callable[[], str]) -> Iterator[str]:
+    """Yield the lines given by extractor of the text returned by read, only read once iterated."""
+    # Read lazily, so an invalid encoding is handled by _scan_lines() as for the other files.
+    yield from extractor(read())
+
+
+async def _aiter(iterable: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+def _file_size(filename: pathlib.Path) -> int:
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def _truncate(line: str, length: int) -> str:
+    """Return the first length characters of line, leaving out a word cut in two at the end."""
+    head = line[:length]
+    if line[length : length + 1].isalpha():
+        head = _CUT_WORD_REGEX.sub("", head)
+    return head
+
+
+def _schedule_batches(filenames: List[pathlib.Path]) -> Iterator[List[pathlib.Path]]:
+    """Group the files into batches, largest files first."""
+    batch, batch_size = [], 0
+    for size, filename in sorted(((_file_size(f), f) for f in filenames), key=lambda t: t[0], reverse=True):
+        batch.append(filename)
+        batch_size += size
+        if batch_size >= BATCH_SIZE_BYTES or len(batch) >= BATCH_MAX_FILES:
+            yield batch
+            batch, batch_size = [], 0
+    if batch:
+        yield batch
 
 
 class MisspellingChecker(IMisspellingChecker):
-    def check(self, filename: pathlib.Path) -> Tuple[List[Exception], List[List[Union[pathlib.Path, int, str]]]]:
+    _matcher = None
+    _lookup: Optional[MisspellingLookup] = None
+    _hooks: Optional["CheckHooks"] = None
+    _dictionary_files: List[pathlib.Path] = []
+    _scan_cache: Optional["ScanCache"] = None
+    _changes: Optional[Mapping[pathlib.Path, "ChangedFile"]] = None
+    _comments_and_strings_only = False
+    _check_generated = False
+    _max_file_size: Optional[int] = None
+    _max_line_length: Optional[int] = None
+    _timeout: Optional[float] = None
+
+    def set_engine(self, engine: str) -> None:
+        """
+        Selects how lines are matched against the misspelled words.
+        Args:
+          engine: One of the MATCHING_ENGINES names.
+
+        Raises:
+          ValueError: Raised if engine isn't a known matching engine.
+        """
+        if engine not in MATCHING_ENGINES:
+            raise ValueError(f'Unknown matching engine "{engine}", use one of {", ".join(MATCHING_ENGINES)}.')
+        self._engine = engine
+        self._matcher = None
+
+    @property
+    def matcher(self):
+        """The matcher of the selected engine, compiled on first use."""
+        if self._matcher is None:
+            start = time.perf_counter()
+            self._matcher = MATCHING_ENGINES[self._engine](self.lookup)
+            if self._hooks is not None:
+                self._hooks.phase("dictionary", time.perf_counter() - start)
+        return self._matcher
+
+    @property
+    def lookup(self) -> MisspellingLookup:
+        """The misspelled words with their suggestions, computed as they're found."""
+        if self._lookup is None:
+            self._lookup = MisspellingLookup(self._misspelling_dict)
+        return self._lookup
+
+    @property
+    def dictionary_files(self) -> List[pathlib.Path]:
+        """The files the misspelled words were loaded from."""
+        return list(self._dictionary_files)
+
+    def set_hooks(self, hooks: Optional["CheckHooks"]) -> None:
+        """
+        Reports what the checker is doing, such as the time spent in each phase
+        and counters of each file, to hooks.
+        Args:
+          hooks: A utils.CheckHooks, e.g. utils.ScanStats. None stops the
+                 reporting, nothing is measured without hooks.
+        """
+        self._hooks = hooks
+
+    def enable_scan_cache(self, cache_dir: Union[pathlib.Path, str], max_size: Optional[int] = None) -> "ScanCache":
+        """
+        Keeps the results of the checked files in cache_dir, so they aren't
+        scanned again as long as they and the misspellings don't change.
+        Args:
+          cache_dir: Directory holding the cache, it can be shared between machines.
+          max_size: Size in bytes the cache is shrunk to by ScanCache.prune().
+
+        Returns:
+          The ScanCache in use.
+        """
+        from .utils.cache import DEFAULT_CACHE_MAX_SIZE, ScanCache
+
+        self._scan_cache = ScanCache(cache_dir, self._cache_digest(), max_size=max_size or DEFAULT_CACHE_MAX_SIZE)
+        return self._scan_cache
+
+    def _cache_digest(self) -> str:
+        """Identifies what the cached results depend on: the misspellings and what is checked of each file."""
+        from .utils.cache import dictionary_digest
+
+        digest = dictionary_digest(self._misspelling_dict)
+        if self._comments_and_strings_only:
+            digest += "-comments"
+        if self._check_generated:
+            digest += "-generated"
+        if self._max_line_length is not None:
+            digest += f"-lines{self._max_line_length}"
+        return digest
+
+    def _cache_variant(self, filename: pathlib.Path) -> str:
+        """Identifies what is checked of a file besides its content: what its name tells."""
+        variant = sniff_name(filename) or ""
+        if self._comments_and_strings_only:
+            from .utils.extractors import find_extractor
+
+            extractor = find_extractor(filename)
+            if extractor is not None:
+                variant += f"-{extractor.__name__}"
+        return variant
+
+    def restrict_to_comments_and_strings(self, enabled: bool = True) -> None:
+        """
+        Only checks the comments, docstrings and string literals of the source
+        files of a known language from now on, e.g. not the identifiers.
+        Other files, such as text or markdown, are checked in full.
+        Args:
+          enabled: False checks whole files again.
+        """
+        self._comments_and_strings_only = enabled
+        self._renew_scan_cache()
+
+    def check_generated_files(self, enabled: bool = True) -> None:
+        """
+        Checks the generated and minified files from now on, which are skipped
+        like binary files by default.
+        Args:
+          enabled: False skips them again.
+        """
+        self._check_generated = enabled
+        self._renew_scan_cache()
+
+    def set_limits(
+        self,
+        max_file_size: Optional[int] = None,
+        max_line_length: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Bounds the work spent on any single file from now on, such as a huge
+        log or a minified bundle. A file over a limit is reported among the
+        errors as a utils.FileLimitExceeded.
+        Args:
+          max_file_size: Files larger than this many bytes are skipped.
+          max_line_length: Only the first characters of longer lines are checked.
+          timeout: Seconds after which a file is no longer checked, the
+                   misspellings found until then are kept.
+        Each limit is removed by None.
+        """
+        self._max_file_size = max_file_size
+        self._max_line_length = max_line_length
+        self._timeout = timeout
+        self._renew_scan_cache()
+
+    def _renew_scan_cache(self) -> None:
+        if self._scan_cache is not None:
+            from .utils.cache import ScanCache
+
+            # The results of the other mode must not be reused.
+            self._scan_cache = ScanCache(
+                self._scan_cache.cache_dir, self._cache_digest(), max_size=self._scan_cache.max_size
+            )
+
+    def restrict_to_changes(self, changes: Optional[Mapping[pathlib.Path, "ChangedFile"]]) -> None:
+        """
+        Only checks the changed lines of the changed files from now on.
+        Args:
+          changes: As returned by utils.collect_changes(), files missing from
+                   it are checked as usual. None checks whole files again.
+        """
+        self._changes = changes
+
+    def check(self, filename: pathlib.Path) -> Tuple[List[Exception], List[Misspelling]]:
         """
         Checks the files for misspellings.
         Returns:
           (errors, results)
           errors: List of system errors, usually file access errors.
           results: List of spelling errors - each tuple is filename,
-                   line number and misspelled word.
+                   line number, misspelled word and column.
         """
         errors = []
-        results = []
-        if not os.path.isdir(filename):
+        results = list(self._iter_results(filename, errors))
+        return errors, results
+
+    def iter_check(self, filename: pathlib.Path) -> Iterator[Misspelling]:
+        """
+        Checks a file for misspellings, yielding each one as soon as it's found.
+        Args:
+          filename: The file to check.
+
+        Returns:
+          Iterator of spelling errors - each one is filename, line number, misspelled word and column.
+
+        Raises:
+          IOError: Raised if filename can't be read.
+        """
+        if os.path.isdir(filename):
+            if self._hooks is not None:
+                self._hooks.file_skipped(filename, "directory")
+            return
+        if self._hooks is None:
+            yield from self._check_file(filename)
+        else:
+            yield from self._observed_check_file(filename)
+
+    def _check_file(self, filename: pathlib.Path, stats: Optional["FileStats"] = None) -> Iterator[Misspelling]:
+        if self._scan_cache is None or self._changes is not None:
+            yield from self._scan_file(filename, stats)
+            return
+
+        if self._max_file_size is not None:
+            # Checked before the cache, which doesn't depend on the limits.
+            self._check_size(filename, os.path.getsize(filename))
+        if self._skipped_kind(filename, stats):
+            # Skipped by its name without hashing it for the cache.
+            return
+        cached, key = self._scan_cache.get(filename, self._cache_variant(filename))
+        if cached is None:
+            # Yielded as found, so the results before a limit is hit are kept,
+            # and only stored once the scan is complete.
+            cached = []
+            for result in self._scan_file(filename, stats):
+                cached.append([result.line, result.column, result.word])
+                yield result
+            self._scan_cache.put(key, cached)
+            return
+        if stats is not None:
+            stats.cached = True
+            stats.bytes = key[1].st_size
+        for line_ct, column, word in cached:
+            yield Misspelling(filename, line_ct, intern(word), column)
+
+    def _observed_check_file(self, filename: pathlib.Path) -> Iterator[Misspelling]:
+        """Same as _check_file(), reporting the time spent and the counters of the file to the hooks."""
+        from .utils.stats import FileStats
+
+        stats = FileStats()
+        results = self._check_file(filename, stats)
+        while True:
+            # Only the time spent in the checker counts, not in the caller between two results.
+            start = time.perf_counter()
             try:
-                with open(filename, "r", encoding="utf-8") as f:
-                    line_ct = 1
-                    for line in f:
-                        if "# ignore-misspelling" in line:
-                            continue
-                        for word in split_words(line):
-                            if word in self._misspelling_dict or word.lower() in self._misspelling_dict:
-                                results.append([filename, line_ct, word])
-                        line_ct += 1
+                result = next(results)
+            except StopIteration:
+                stats.seconds += time.perf_counter() - start
+                break
+            except FileLimitExceeded:
+                # Counted up to the limit, the limit itself is reported by _iter_results().
+                stats.seconds += time.perf_counter() - start
+                self._file_checked(filename, stats)
+                raise
+            stats.seconds += time.perf_counter() - start
+            stats.hits += 1
+            yield result
+        self._file_checked(filename, stats)
+
+    def _file_checked(self, filename: pathlib.Path, stats: "FileStats") -> None:
+        hooks = self._hooks
+        hooks.phase("read", stats.seconds - stats.match_seconds)
+        hooks.phase("match", stats.match_seconds)
+        hooks.file_checked(filename, stats)
+        if stats.skipped is not None:
+            hooks.file_skipped(filename, stats.skipped)
+
+    def _find_word_columns(self, stats: Optional["FileStats"]) -> Callable[[str], Iterable[Tuple[int, str]]]:
+        """Return the find_word_columns() of the matcher, timing it and counting tokens and lookups into stats."""
+        if stats is None:
+            return self.matcher.find_word_columns
+
+        from .utils import tokenize
+        from .utils.stats import ProbeCounter
+
+        probe_counter = ProbeCounter(self.lookup)
+        matcher_find_word_columns = self.matcher.with_lookup(probe_counter).find_word_columns
+
+        def find_word_columns(line: str) -> List[Tuple[int, str]]:
+            start = time.perf_counter()
+            words = list(matcher_find_word_columns(line))
+            stats.match_seconds += time.perf_counter() - start
+            stats.tokens += len(tokenize(line))
+            stats.lookups = probe_counter.probes
+            return words
+
+        return find_word_columns
+
+    def _scan_file(self, filename: pathlib.Path, stats: Optional["FileStats"] = None) -> Iterator[Misspelling]:
+        changed = self._changes.get(pathlib.Path(filename)) if self._changes is not None else None
+        extractor = None
+        if self._comments_and_strings_only:
+            from .utils.extractors import find_extractor
+
+            extractor = find_extractor(filename)
+        if changed is None or changed.content is None:
+            size = os.path.getsize(filename)
+            if stats is not None:
+                stats.bytes = size
+            self._check_size(filename, size)
+            if self._skipped_kind(filename, stats):
+                return
+            # The first block tells binary or generated files apart before
+            # anything is decoded, it's read again from the buffer if not.
+            with open(filename, "rb") as f:
+                if self._skipped_kind(filename, stats, f.read(SNIFF_SIZE)):
+                    return
+                f.seek(0)
+                if changed is None and size >= MMAP_MIN_SIZE and extractor is None:
+                    yield from self._scan_mapped(filename, f, stats)
+                    return
+                text_file = io.TextIOWrapper(f, encoding="utf-8")
+                lines = text_file if extractor is None else _extracted_lines(extractor, text_file.read)
+                yield from self._scan_lines(filename, lines, changed and changed.lines, stats)
+        else:
+            if stats is not None:
+                stats.bytes = len(changed.content)
+            self._check_size(filename, len(changed.content))
+            if self._skipped_kind(filename, stats) or self._skipped_kind(filename, stats, changed.content[:SNIFF_SIZE]):
+                return
+            try:
+                text = changed.content.decode("utf-8")
             except UnicodeDecodeError:
-                pass
-            except IOError as exception:
-                errors.append(exception)
-        return errors, results
+                if stats is not None:
+                    stats.skipped = "not valid UTF-8"
+                return
+            if extractor is None:
+                lines = text.splitlines(keepends=True)
+            else:
+                lines = extractor(_TEXT_LINE_REGEX.sub("\n", text))
+            yield from self._scan_lines(filename, lines, changed.lines, stats)
+
+    def _check_size(self, filename: pathlib.Path, size: int) -> None:
+        if self._max_file_size is not None and size > self._max_file_size:
+            raise FileLimitExceeded(
+                filename, "too large", f"skipped as {size} bytes is over the {self._max_file_size} bytes limit"
+            )
+
+    def _deadline(self) -> Optional[float]:
+        return time.perf_counter() + self._timeout if self._timeout is not None else None
+
+    def _timed_out(self, filename: pathlib.Path, line_ct: int) -> FileLimitExceeded:
+        return FileLimitExceeded(filename, "timed out", f"stopped at line {line_ct} after {self._timeout} seconds")
+
+    def _limited_lines(
+        self, filename: pathlib.Path, lines: Iterable[str], stats: Optional["FileStats"]
+    ) -> Iterator[str]:
+        """Yield lines, truncated to the maximum line length, until the time limit of the file."""
+        max_length = self._max_line_length
+        deadline = self._deadline()
+        for line_ct, line in enumerate(lines, start=1):
+            # A line ignored by its end is left whole, so it's still ignored.
+            if max_length is not None and len(line) > max_length and "# ignore-misspelling" not in line:
+                line = _truncate(line, max_length)
+                if stats is not None:
+                    stats.truncated += 1
+            if deadline is not None and line_ct % TIMEOUT_CHECK_LINES == 0 and time.perf_counter() > deadline:
+                raise self._timed_out(filename, line_ct)
+            yield line
+
+    def _skipped_kind(
+        self, filename: pathlib.Path, stats: Optional["FileStats"], block: Optional[bytes] = None
+    ) -> Optional[str]:
+        """
+        Return BINARY or GENERATED if the file isn't checked, from its name, or
+        from its first block when given, None if it is.
+        """
+        kind = sniff_name(filename) if block is None else sniff(block, filename)
+        if kind == GENERATED and self._check_generated:
+            kind = None
+        if kind is not None and stats is not None:
+            stats.skipped = kind
+        return kind
+
+    def _scan_mapped(
+        self, filename: pathlib.Path, f: BinaryIO, stats: Optional["FileStats"] = None
+    ) -> Iterator[Misspelling]:
+        """
+        Scans a big file without decoding all of it.
+
+        The file is memory-mapped and split into runs of letters directly on
+        the bytes, a block at a time. Each distinct run goes through the
+        matcher once, and only the lines holding a misspelled run are decoded
+        and checked as usual. Line numbers are counted on the mapped buffer.
+        A line that isn't valid UTF-8 is skipped, not the rest of the file.
+        """
+        find_word_columns = self._find_word_columns(stats)
+        max_length = self._max_line_length
+        deadline = self._deadline()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if _LONE_CR_REGEX.search(buffer):
+                f.seek(0)
+                yield from self._scan_lines(filename, io.TextIOWrapper(f, encoding="utf-8"), stats=stats)
+                return
+
+            # Whether each distinct run holds a misspelling.
+            misspelled_runs: Dict[bytes, bool] = {}
+            line_ct, counted_up_to, block_start = 1, 0, 0
+            while block_start < len(buffer):
+                if deadline is not None and time.perf_counter() > deadline:
+                    line_ct += len(_NEWLINE_REGEX.findall(buffer, counted_up_to, block_start))
+                    raise self._timed_out(filename, line_ct)
+                block_end = buffer.find(b"\n", block_start + MMAP_BLOCK_SIZE)
+                block_end = len(buffer) if block_end < 0 else block_end + 1
+                line_end = block_start
+                for match in _RUN_REGEX.finditer(buffer, block_start, block_end):
+                    position = match.start()
+                    if position < line_end:
+                        continue
+                    run = match.group()
+                    misspelled = misspelled_runs.get(run)
+                    if misspelled is None:
+                        misspelled = any(True for _ in find_word_columns(run.decode("utf-8", "replace")))
+                        if len(misspelled_runs) >= MMAP_RUN_MEMO_SIZE:
+                            misspelled_runs.clear()
+                        misspelled_runs[run] = misspelled
+                    if not misspelled:
+                        continue
+                    line_start = buffer.rfind(b"\n", 0, position) + 1
+                    line_end = buffer.find(b"\n", position)
+                    line_end = len(buffer) if line_end < 0 else line_end + 1
+                    line_ct += len(_NEWLINE_REGEX.findall(buffer, counted_up_to, line_start))
+                    counted_up_to = line_start
+                    try:
+                        line = buffer[line_start:line_end].decode("utf-8")
+                    except UnicodeDecodeError:
+                        continue
+                    if "# ignore-misspelling" in line:
+                        continue
+                    if max_length is not None and len(line) > max_length:
+                        line = _truncate(line, max_length)
+                        if stats is not None:
+                            stats.truncated += 1
+                    for column, word in find_word_columns(line):
+                        yield Misspelling(filename, line_ct, intern(word), column)
+                block_start = block_end
+            if stats is not None:
+                stats.lines = line_ct + len(_NEWLINE_REGEX.findall(buffer, counted_up_to)) - (buffer[-1:] == b"\n")
+
+    def _scan_lines(
+        self,
+        filename: pathlib.Path,
+        lines: Iterable[str],
+        only_lines: Optional[AbstractSet[int]] = None,
+        stats: Optional["FileStats"] = None,
+    ) -> Iterator[Misspelling]:
+        find_word_columns = self._find_word_columns(stats)
+        if self._max_line_length is not None or self._timeout is not None:
+            lines = self._limited_lines(filename, lines, stats)
+        last_line = max(only_lines, default=0) if only_lines is not None else None
+        line_ct = 0
+        try:
+            for line_ct, line in enumerate(lines, start=1):
+                if only_lines is not None and line_ct not in only_lines:
+                    if line_ct > last_line:
+                        break
+                    continue
+                if "# ignore-misspelling" in line:
+                    continue
+                for column, word in find_word_columns(line):
+                    yield Misspelling(filename, line_ct, intern(word), column)
+        except UnicodeDecodeError:
+            if stats is not None:
+                stats.skipped = "not valid UTF-8"
+        if stats is not None:
+            stats.lines = line_ct
+
+    def check_text(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Checks a string for misspellings, without touching the filesystem.
+        Args:
+          text: The text to check, lines ending as in a file.
+
+        Returns:
+          List of spelling errors - each one is line number, column and
+          misspelled word, both counted from 1.
+        """
+        return [(line_ct, column, word) for _, line_ct, column, word in self.check_many_texts([text])]
+
+    def check_many_texts(self, texts: Iterable[str]) -> Iterator[Tuple[int, int, int, str]]:
+        """
+        Checks many strings for misspellings, such as commit messages or text fields.
+
+        Results are yielded as they're found. The matches of each distinct
+        line are remembered for the whole batch, so templated or repeated
+        text is only matched once.
+        Args:
+          texts: The texts to check, lines ending as in a file.
+
+        Returns:
+          Iterator of spelling errors - each one is the index of the text in
+          texts, line number, column and misspelled word.
+        """
+        find_word_columns = self.matcher.find_word_columns
+        seen: Dict[str, Tuple[Tuple[int, str], ...]] = {}
+        for index, text in enumerate(texts):
+            for line_ct, line in enumerate(_TEXT_LINE_REGEX.split(text), start=1):
+                matches = seen.get(line)
+                if matches is None:
+                    if "# ignore-misspelling" in line:
+                        matches = ()
+                    else:
+                        matches = tuple(find_word_columns(line))
+                    if len(seen) >= TEXT_MEMO_SIZE:
+                        seen.clear()
+                    seen[line] = matches
+                for column, word in matches:
+                    yield index, line_ct, column, word
+
+    def _iter_results(self, filename: pathlib.Path, errors: List[Exception]) -> Iterator[Misspelling]:
+        """Same as iter_check(), but file access errors and exceeded limits are appended to errors."""
+        try:
+            yield from self.iter_check(filename)
+        except IOError as exception:
+            errors.append(exception)
+            if self._hooks is not None:
+                self._hooks.file_failed(filename, exception)
+        except FileLimitExceeded as exception:
+            errors.append(exception)
+            if self._hooks is not None:
+                self._hooks.file_skipped(filename, exception.reason)
+
+    def check_many(
+        self, filenames: Iterable[pathlib.Path], jobs: int = 1
+    ) -> Iterator[Tuple[pathlib.Path, List[Exception], Iterable[Misspelling]]]:
+        """
+        Checks several files for misspellings, optionally on a pool of processes.
+        Args:
+          filenames: The files to check.
+          jobs: Number of processes to use, 0 means one per CPU.
+
+        Returns:
+          Iterator of (filename, errors, results) in the same order as filenames,
+          errors and results as returned by check(). With a single job the files
+          are checked as they're consumed: results is then a lazy iterator and
+          errors is complete once it's exhausted.
+        """
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        if self._hooks is not None:
+            filenames = self._timed_walk(filenames)
+        if jobs == 1:
+            for filename in filenames:
+                errors = []
+                yield filename, errors, self._iter_results(filename, errors)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        filenames = list(filenames)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(self,)) as executor:
+            pending = {}
+            for batch in _schedule_batches(filenames):
+                future = executor.submit(_check_batch_in_worker, batch)
+                for index, filename in enumerate(batch):
+                    pending[filename] = (future, index)
+            try:
+                for filename in filenames:
+                    future, index = pending[filename]
+                    errors, results, events = future.result()[index]
+                    for event, args in events or ():
+                        getattr(self._hooks, event)(*args)
+                    yield filename, errors, results
+            finally:
+                # The batches not started yet are dropped when the caller stops early.
+                for future, _ in pending.values():
+                    future.cancel()
+
+    def _timed_walk(self, filenames: Iterable[pathlib.Path]) -> Iterator[pathlib.Path]:
+        """Yield filenames, reporting the time spent listing them, e.g. walking directories, to the hooks."""
+        filenames = iter(filenames)
+        while True:
+            start = time.perf_counter()
+            filename = next(filenames, None)
+            self._hooks.phase("walk", time.perf_counter() - start)
+            if filename is None:
+                return
+            yield filename
+
+    async def acheck(
+        self, filename: pathlib.Path, executor: Optional["Executor"] = None
+    ) -> Tuple[List[Exception], List[Misspelling]]:
+        """
+        Same as check(), run in an executor so the event loop isn't blocked.
+        Args:
+          filename: The file to check.
+          executor: Runs the check, None for the default executor of the loop.
+        """
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(executor, self.check, filename)
+
+    async def acheck_many(
+        self,
+        filenames: Union[Iterable[pathlib.Path], AsyncIterable[pathlib.Path]],
+        concurrency: int = 4,
+        executor: Optional["Executor"] = None,
+    ) -> AsyncIterator[Tuple[pathlib.Path, List[Exception], List[Misspelling]]]:
+        """
+        Checks several files in an executor, without blocking the event loop.
+
+        At most concurrency files are being checked at once, and no more are
+        started until the caller consumes the results, so a huge tree can't
+        flood the executor. Closing the iterator or cancelling the task
+        iterating it cancels the checks that didn't start yet.
+
+        Args:
+          filenames: The files to check, an iterator or an async iterator.
+          concurrency: Maximum number of files checked at once.
+          executor: Runs the checks, None for the default executor of the
+                    loop. A thread pool shares this checker, a process pool
+                    receives a copy of it along with every file.
+
+        Returns:
+          Async iterator of (filename, errors, results) in the same order as
+          filenames, errors and results as returned by check().
+
+        Raises:
+          ValueError: Raised if concurrency is lower than 1.
+        """
+        import asyncio
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be 1 or more.")
+        loop = asyncio.get_running_loop()
+        pending: Deque[Tuple[pathlib.Path, "asyncio.Future"]] = collections.deque()
+        try:
+            async for filename in _aiter(filenames):
+                pending.append((filename, loop.run_in_executor(executor, self.check, filename)))
+                if len(pending) >= concurrency:
+                    filename, future = pending.popleft()
+                    yield (filename, *await future)
+            while pending:
+                filename, future = pending.popleft()
+                yield (filename, *await future)
+        finally:
+            for _, future in pending:
+                future.cancel()
 
     def get_suggestions(self, word: str) -> List[str]:
         """
@@ -49,8 +784,7 @@ class MisspellingChecker(IMisspellingChecker):
           List of zero or more suggested replacements for word.
 
         """
-        suggestions = set(self._misspelling_dict.get(word, [])).union(set(self._misspelling_dict.get(word.lower(), [])))
-        return sorted(same_case(source=word, destination=w) for w in suggestions)
+        return list(self.lookup.suggestions(word))
 
     def dump_corrections(self) -> List[List[str]]:
         """Returns a list of misspelled words and corrections."""
@@ -60,46 +794,72 @@ class MisspellingChecker(IMisspellingChecker):
                 results.append([bad_word, correction])
         return results
 
-    def print_result(self, filenames: Iterator[pathlib.Path], output: StreamWriter) -> bool:
+    def report(
+        self, filenames: Iterable[pathlib.Path], sinks: Iterable["ResultSink"], jobs: int = 1, fail_fast: bool = False
+    ) -> bool:
         """
-        Print a list of misspelled words and their corrections.
-
-        Return True if misspellings are found.
+        Checks files once and hands every result and error to all the sinks.
+        Args:
+          filenames: The files to check.
+          sinks: The outputs to produce, such as utils.TextSink or utils.SedScriptSink.
+          jobs: Number of processes to use, 0 means one per CPU.
+          fail_fast: Stop checking at the first misspelling, the only result given to the sinks.
 
+        Returns:
+          True if misspellings are found.
         """
+        sinks = list(sinks)
+        hooks = self._hooks
         found = False
+        for sink in sinks:
+            sink.start(self.lookup)
+        scan = self.check_many(filenames, jobs=jobs)
+        try:
+            for filename, errors, results in scan:
+                output_seconds = 0.0
+                for res in results:
+                    found = True
+                    start = time.perf_counter() if hooks is not None else 0.0
+                    for sink in sinks:
+                        sink.add_result(res)
+                    if hooks is not None:
+                        output_seconds += time.perf_counter() - start
+                    if fail_fast:
+                        break
+                start = time.perf_counter() if hooks is not None else 0.0
+                for err in errors:
+                    for sink in sinks:
+                        sink.add_error(filename, err)
+                for sink in sinks:
+                    sink.end_file(filename)
+                if hooks is not None:
+                    hooks.phase("output", output_seconds + time.perf_counter() - start)
+                if found and fail_fast:
+                    break
+        finally:
+            # Stops the worker processes before their files are checked.
+            scan.close()
+            # Buffered results are written out even when the scan is interrupted.
+            for sink in sinks:
+                sink.finish()
+        return found
 
-        for filename in filenames:
-            errors, results = self.check(filename)
-            for res in results:
-                suggestions = ",".join(['"%s"' % w for w in self.get_suggestions(res[2])])
-                output.write(f"{res[0]}:{res[1]}: {res[2]} -> {suggestions}\n")
-                found = True
+    def print_result(self, filenames: Iterator[pathlib.Path], output: StreamWriter, jobs: int = 1) -> bool:
+        """
+        Print a list of misspelled words and their corrections.
 
-            for err in errors:
-                sys.stderr.write("ERROR: %s\n" % err)
-            output.flush()
+        Return True if misspellings are found.
 
-        return found
+        """
+        return self.report(filenames, [TextSink(output, errors=sys.stderr)], jobs=jobs)
 
-    def export_result_to_file(self, filenames: Iterator[pathlib.Path], output: TextIO) -> None:
+    def export_result_to_file(self, filenames: Iterator[pathlib.Path], output: TextIO, jobs: int = 1) -> None:
         """
         Save the list of misspelled words and their corrections into a file.
         """
+        self.report(filenames, [TextSink(output)], jobs=jobs)
 
-        for filename in filenames:
-            _, results = self.check(filename)
-            for res in results:
-                output.write(
-                    "{}:{}: {} -> {}\n".format(
-                        res[0],
-                        res[1],
-                        res[2],
-                        ",".join(['"%s"' % w for w in self.get_suggestions(res[2])]),
-                    )
-                )
-
-    def output_sed_commands(self, parser: TapType, args: TapType, filenames: Iterator[pathlib.Path]) -> None:
+    def output_sed_commands(self, parser: "TapType", args: "TapType", filenames: Iterator[pathlib.Path]) -> None:
         """
         Output a series of portable sed commands to change the file.
         """
@@ -109,20 +869,5 @@ class MisspellingChecker(IMisspellingChecker):
             parser.error('The sed script file "%s" must not exist.' % args.script_output)
 
         with open(args.script_output, "w", encoding="utf-8") as sed_script:
-            for filename in filenames:
-                errors, results = self.check(filename)
-                for res in results:
-                    suggestions = self.get_suggestions(res[2])
-                    if len(suggestions) == 1:
-                        suggestion = suggestions[0]
-                    else:
-                        suggestion = self.suggestion_generator.get_suggestion(res[0], res[1], res[2], suggestions)
-                    if suggestion != res[2]:
-                        sed_script.write(
-                            f'cp "{esc_file(res[0])}" "{esc_file(res[0])},"\n'
-                            f'sed "{res[1]}s/{esc_sed(res[2])}/{esc_sed(suggestion)}/"'
-                            f' "{esc_file(res[0])}" > "{esc_file(res[0])},"\n'
-                            f'mv "{esc_file(res[0])}," "{esc_file(res[0])}"\n'
-                        )
-                for err in errors:
-                    sys.stderr.write(f"ERROR: {err}\n" % err)
+            sink = SedScriptSink(sed_script, self.suggestion_generator, errors=sys.stderr)
+            self.report(filenames, [sink], jobs=args.jobs)
@@ -1,9 +1,12 @@
-import json
 import os
 import pathlib
 from typing import List
 
 from .misspelling_checker import MisspellingChecker
+from .utils import DEFAULT_MATCHING_ENGINE, load_index
+
+# Index compiled from the default json files, see bin/format_misspelling_file_into_json.py.
+PACKAGED_INDEX = pathlib.Path(__file__).parents[0] / "indexes" / "default.msidx"
 
 
 class MisspellingDetector(MisspellingChecker):
@@ -11,22 +14,26 @@ class MisspellingDetector(MisspellingChecker):
     Detects misspelled words in files.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, engine: str = DEFAULT_MATCHING_ENGINE) -> None:
         """
         Initialises a MisspellingDetector instance using the default json files.
+
+        Args:
+          engine: Name of the matching engine used to find the misspelled words.
+
+        Raises:
+          ValueError: Raised if engine isn't a known matching engine.
         """
-        self._misspelling_dict = {}
-        file_paths = self._get_default_json_files()
-        for dictionary in file_paths:
-            with open(os.path.join(os.path.dirname(__file__), dictionary), encoding="utf-8") as input_file:
-                self._misspelling_dict.update(json.load(input_file))
+        self.set_engine(engine)
+        self._dictionary_files = self._get_default_json_files()
+        self._misspelling_dict = load_index(self._dictionary_files, packaged_index=PACKAGED_INDEX)
 
     @staticmethod
     def _get_default_json_files() -> List[pathlib.Path]:
         assets_dir = pathlib.Path(__file__).parents[0] / "json_sources"
         file_paths = [
             assets_dir.joinpath(file)
-            for file in os.listdir(assets_dir.as_posix())
+            for file in sorted(os.listdir(assets_dir.as_posix()))
             if os.path.isfile(assets_dir.joinpath(file))
         ]
         return file_paths
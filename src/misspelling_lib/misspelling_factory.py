@@ -4,6 +4,7 @@ from typing import Any, Dict, Optional, Union
 from .misspelling_detector import MisspellingDetector
 from .misspelling_file_detector import MisspellingFileDetector
 from .misspelling_json_detector import MisspellingJSONDetector
+from .utils import DEFAULT_MATCHING_ENGINE
 
 MisspellingDetectorType = Union[MisspellingDetector, MisspellingFileDetector, MisspellingJSONDetector]
 
@@ -11,12 +12,15 @@ MisspellingDetectorType = Union[MisspellingDetector, MisspellingFileDetector, Mi
 class MisspellingFactory:
     @classmethod
     def factory(
-        cls, misspelling_detector_name: str, misspelling_file: Optional[Union[Path, None]] = None
+        cls,
+        misspelling_detector_name: str,
+        misspelling_file: Optional[Union[Path, None]] = None,
+        engine: str = DEFAULT_MATCHING_ENGINE,
     ) -> MisspellingDetectorType:
         class_map = cls.get_misspelling_class_map()
         if misspelling_detector_name == "misspelling_detector":
-            return class_map.get(misspelling_detector_name)()
-        return class_map.get(misspelling_detector_name)(misspelling_file)
+            return class_map.get(misspelling_detector_name)(engine=engine)
+        return class_map.get(misspelling_detector_name)(misspelling_file, engine=engine)
 
     @staticmethod
     def get_misspelling_class_map() -> Dict[str, Any]:
@@ -3,6 +3,7 @@ import pathlib
 from typing import Union
 
 from .misspelling_checker import MisspellingChecker
+from .utils import DEFAULT_MATCHING_ENGINE
 
 
 class MisspellingFileDetector(MisspellingChecker):
@@ -13,17 +14,21 @@ class MisspellingFileDetector(MisspellingChecker):
     def __init__(
         self,
         misspelling_file: Union[pathlib.Path, str],
+        engine: str = DEFAULT_MATCHING_ENGINE,
     ) -> None:
         """
         Initialises a MisspellingFileDetector instance.
 
         Args:
           misspelling_file: Filename with a list of misspelled words and their corrections.
+          engine: Name of the matching engine used to find the misspelled words.
 
         Raises:
           IOError: Raised if misspelling_file can't be found.
           ValueError: Raised if misspelling_file isn't correctly formatted.
         """
+        self.set_engine(engine)
+        self._dictionary_files = [pathlib.Path(misspelling_file)]
         self._misspelling_dict = collections.defaultdict(list)
         with open(misspelling_file, "r", encoding="utf-8") as f:
             for line in f:
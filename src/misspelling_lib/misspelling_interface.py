@@ -1,19 +1,33 @@
 import abc
 import pathlib
 from codecs import StreamWriter
-from typing import DefaultDict, Dict, List, TextIO, Tuple, Union
+from typing import TYPE_CHECKING, DefaultDict, Dict, Iterable, Iterator, List, TextIO, Tuple, Union
 
-from tap.tap import TapType
+from .utils import DEFAULT_MATCHING_ENGINE, Misspelling, SuggestionGenerator
 
-from .utils import SuggestionGenerator
+if TYPE_CHECKING:
+    from tap.tap import TapType
+
+    from .utils.sinks import ResultSink
 
 
 class IMisspellingChecker(metaclass=abc.ABCMeta):
     _misspelling_dict: Union[DefaultDict, Dict]
+    _engine: str = DEFAULT_MATCHING_ENGINE
     suggestion_generator = SuggestionGenerator()
 
     @abc.abstractmethod
-    def check(self, filename: str) -> Tuple[List[Exception], List[List[Union[str, int, str]]]]:
+    def check(self, filename: str) -> Tuple[List[Exception], List[Misspelling]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def iter_check(self, filename: pathlib.Path) -> Iterator[Misspelling]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def check_many(
+        self, filenames: Iterable[pathlib.Path], jobs: int = 1
+    ) -> Iterator[Tuple[pathlib.Path, List[Exception], Iterable[Misspelling]]]:
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -24,23 +38,30 @@ class IMisspellingChecker(metaclass=abc.ABCMeta):
     def dump_corrections(self) -> List[List[str]]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def report(
+        self, filenames: Iterable[pathlib.Path], sinks: Iterable["ResultSink"], jobs: int = 1, fail_fast: bool = False
+    ) -> bool:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def print_result(
         self,
         filenames: List[pathlib.Path],
         output: StreamWriter,
+        jobs: int = 1,
     ) -> bool:
         raise NotImplementedError
 
     @abc.abstractmethod
-    def export_result_to_file(self, filenames: List[pathlib.Path], output: TextIO) -> None:
+    def export_result_to_file(self, filenames: List[pathlib.Path], output: TextIO, jobs: int = 1) -> None:
         raise NotImplementedError
 
     @abc.abstractmethod
     def output_sed_commands(
         self,
-        parser: TapType,
-        args: TapType,
+        parser: "TapType",
+        args: "TapType",
         filenames: List[pathlib.Path],
     ) -> None:
         raise NotImplementedError
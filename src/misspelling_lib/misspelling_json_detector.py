@@ -4,6 +4,7 @@ import pathlib
 from typing import Union
 
 from .misspelling_checker import MisspellingChecker
+from .utils import DEFAULT_MATCHING_ENGINE
 
 
 class MisspellingJSONDetector(MisspellingChecker):
@@ -14,18 +15,22 @@ class MisspellingJSONDetector(MisspellingChecker):
     def __init__(
         self,
         misspelling_json_file: Union[pathlib.Path, str],
+        engine: str = DEFAULT_MATCHING_ENGINE,
     ) -> None:
         """
         Initialises a MisspellingJSONDetector instance.
 
         Args:
           misspelling_json_file: JSON filename of misspelled words and their corrections.
+          engine: Name of the matching engine used to find the misspelled words.
 
         Raises:
           IOError: Raised if misspelling_json_file can't be found.
           ValueError: Raised if misspelling_json_file isn't correctly formatted.
 
         """
+        self.set_engine(engine)
+        self._dictionary_files = [pathlib.Path(misspelling_json_file)]
         self._misspelling_dict = collections.defaultdict(list)
         with open(misspelling_json_file, "r", encoding="utf-8") as custom_json_file:
             custom_dict_with_misspelled_words = json.load(custom_json_file)
@@ -15,28 +15,88 @@ source code and identify misspelled words.
 """
 
 import codecs
+import contextlib
+import os
 import signal
 import sys
+import time
 from pathlib import Path
-from typing import Optional
-
-from rich.console import Console
+from typing import TYPE_CHECKING, List, Optional
 
 file = Path(__file__).resolve()
 package_root_directory = file.parent.parent
 sys.path.append(str(package_root_directory))
 
 
-from misspelling_lib import MisspellingFactory
-from misspelling_lib.utils import MisspellingArgumentParser, expand_directories, parse_file_list
+from misspelling_lib.utils import CountSink, SedScriptSink, TextSink, expand_directories, parse_file_list
 from misspelling_lib.utils.version import __version__
 
+if TYPE_CHECKING:
+    from misspelling_lib.misspelling_interface import IMisspellingChecker
+    from misspelling_lib.utils import MisspellingArgumentParser
+
+
+def create_detector(args: "MisspellingArgumentParser") -> "IMisspellingChecker":
+    """Create the detector of the dictionary selected by the arguments."""
+    # Imported here so forward_to_daemon() doesn't pay for the detectors.
+    from misspelling_lib import MisspellingFactory
+
+    if args.misspelling_file:
+        detector = MisspellingFactory.factory(
+            misspelling_detector_name="misspelling_file_detector",
+            misspelling_file=args.misspelling_file,
+            engine=args.engine,
+        )
+    elif args.json_file:
+        detector = MisspellingFactory.factory(
+            misspelling_detector_name="misspelling_json_detector",
+            misspelling_file=args.json_file,
+            engine=args.engine,
+        )
+    else:
+        detector = MisspellingFactory.factory(misspelling_detector_name="misspelling_detector", engine=args.engine)
+    if args.comments_only:
+        detector.restrict_to_comments_and_strings()
+    if args.check_generated:
+        detector.check_generated_files()
+    if args.max_file_size or args.max_line_length or args.file_timeout:
+        detector.set_limits(
+            max_file_size=args.max_file_size * 1024 or None,
+            max_line_length=args.max_line_length or None,
+            timeout=args.file_timeout or None,
+        )
+    return detector
+
+
+def forward_to_daemon(argv: List[str]) -> Optional[int]:
+    """
+    Have the daemon listening on --socket check the files when nothing but
+    files are given, before tap or the dictionary are even imported.
+
+    Returns:
+      The exit code, None if the files have to be checked here.
+    """
+    if len(argv) < 3 or argv[0] != "--socket" or any(arg.startswith("-") for arg in argv[2:]):
+        return None
+    from misspelling_lib.utils.server import forward_to_daemon
+
+    output = codecs.getwriter("utf-8")(sys.stdout.buffer if hasattr(sys.stdout, "buffer") else sys.stdout)
+    return forward_to_daemon(argv[1], argv[2:], output, sys.stderr)
+
 
 def entrypoint() -> Optional[int]:
     """Internal main entry point."""
+    # Imported here so forward_to_daemon() doesn't pay for tap.
+    from misspelling_lib.utils import MisspellingArgumentParser
+
     parser = MisspellingArgumentParser()
     args = parser.parse_args()
 
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number.")
+    if min(args.max_file_size, args.max_line_length, args.file_timeout) < 0:
+        parser.error("--max-file-size, --max-line-length and --file-timeout must be 0 or positive numbers.")
+
     if args.file_list:
         try:
             args.files += parse_file_list(args.file_list)
@@ -46,46 +106,111 @@ def entrypoint() -> Optional[int]:
     output = codecs.getwriter("utf-8")(sys.stdout.buffer if hasattr(sys.stdout, "buffer") else sys.stdout)
 
     if args.version:
+        # Only imported here as rich takes longer to import than a whole check.
+        from rich.console import Console
+
         console = Console()
         console.print(f"[green]misspellings version[/green]: [bold green]{__version__}")
         return 0
 
-    if args.misspelling_file:
-        misspelling = MisspellingFactory.factory(
-            misspelling_detector_name="misspelling_file_detector",
-            misspelling_file=args.misspelling_file,
-        )
-        args.files = expand_directories(args.files)
+    if args.serve:
+        from misspelling_lib.utils.server import MisspellingServer
 
-        if args.export_file:
-            with open(args.export_file, "w", encoding="utf-8") as correction_file:
-                misspelling.export_result_to_file(filenames=args.files, output=correction_file)
-    elif args.json_file:
-        misspelling = MisspellingFactory.factory(
-            misspelling_detector_name="misspelling_json_detector",
-            misspelling_file=args.json_file,
-        )
-        args.files = expand_directories(args.files)
+        try:
+            server = MisspellingServer(lambda: create_detector(args))
+            if args.socket:
+                server.serve_unix_socket(args.socket)
+            else:
+                server.serve_stream(sys.stdin.buffer, sys.stdout.buffer)
+        except IOError as exception:
+            parser.error(exception)
+        return 0
 
-        if args.export_file:
-            with open(args.export_file, "w", encoding="utf-8") as correction_file:
-                misspelling.export_result_to_file(filenames=args.files, output=correction_file)
-    else:
-        misspelling = MisspellingFactory.factory(misspelling_detector_name="misspelling_detector")
-        args.files = expand_directories(args.files)
+    start = time.perf_counter()
+    misspelling = create_detector(args)
+    stats = None
+    if args.stats:
+        from misspelling_lib.utils import ScanStats
 
-        if args.export_file:
-            with open(args.export_file, "w", encoding="utf-8") as correction_file:
-                misspelling.export_result_to_file(filenames=args.files, output=correction_file)
+        stats = ScanStats(slowest=args.stats_slowest)
+        stats.phase("dictionary", time.perf_counter() - start)
+        misspelling.set_hooks(stats)
+
+    scan_cache = None
+    if args.cache_dir:
+        scan_cache = misspelling.enable_scan_cache(args.cache_dir, max_size=args.cache_max_size * 1024 * 1024)
+
+    if args.diff or args.staged:
+        from misspelling_lib.utils import collect_changes
+
+        try:
+            changes = collect_changes(diff=args.diff, staged=args.staged, paths=args.files)
+        except IOError as exception:
+            parser.error(exception)
+        misspelling.restrict_to_changes(changes)
+        args.files = list(changes)
+    else:
+        args.files = expand_directories(args.files, threads=args.walk_threads, ignore_files=not args.no_ignore)
+
+    if args.script_output and os.path.exists(args.script_output):
+        # Emit an error is the file already exists in case the user
+        # forgets to give the file - but does give source files.
+        parser.error('The sed script file "%s" must not exist.' % args.script_output)
+    if args.fix and args.script_output:
+        parser.error("--fix and --script-output can't be used together.")
+    if args.dry_run and not args.fix:
+        parser.error("--dry-run is only used with --fix.")
+    if args.fail_fast and (args.fix or args.script_output):
+        parser.error("--fail-fast can't be used with --fix or --script-output.")
 
     if args.dump_misspelling:
         for word, correction in misspelling.dump_corrections():
             output.write("%s %s\n" % (word, correction))
 
-    if args.script_output:
-        misspelling.output_sed_commands(parser, args, filenames=args.files)
-    else:
-        return 2 if misspelling.print_result(filenames=args.files, output=output) else 0
+    # Every output is fed by a single scan of the files.
+    with contextlib.ExitStack() as stack:
+        sinks = []
+        fix_sink = None
+        # The file access errors are printed by a single sink.
+        errors = sys.stderr
+        if args.fix:
+            from misspelling_lib.utils import FixSink
+
+            threads = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+            fix_sink = FixSink(output if args.dry_run else None, threads=threads, errors=errors)
+            sinks.append(fix_sink)
+            errors = None
+        if args.export_file:
+            correction_file = stack.enter_context(open(args.export_file, "w", encoding="utf-8"))
+            sinks.append(TextSink(correction_file))
+        if args.script_output:
+            sed_script = stack.enter_context(open(args.script_output, "w", encoding="utf-8"))
+            sinks.append(SedScriptSink(sed_script, misspelling.suggestion_generator, errors=errors))
+        elif args.dry_run:
+            # The diff is the output.
+            pass
+        elif args.count:
+            sinks.append(CountSink(output, errors=errors))
+        elif args.output_format != "text":
+            from misspelling_lib.utils import create_sink
+
+            sinks.append(
+                create_sink(args.output_format, output, errors, buffer_size=args.buffer_size, flush=args.flush)
+            )
+        else:
+            sinks.append(TextSink(output, errors=errors, buffer_size=args.buffer_size, flush=args.flush))
+        try:
+            found = misspelling.report(args.files, sinks, jobs=args.jobs, fail_fast=args.fail_fast)
+        finally:
+            if scan_cache is not None:
+                scan_cache.prune()
+            if stats is not None:
+                stats.write_report(sys.stderr)
+
+    if fix_sink is not None and not args.dry_run:
+        # Only what is left to correct by hand counts.
+        return 2 if fix_sink.unfixed or fix_sink.failed else 0
+    return 2 if found and not args.script_output else 0
 
 
 def main():
@@ -97,6 +222,9 @@ def main():
         pass
 
     try:
+        exit_code = forward_to_daemon(sys.argv[1:])
+        if exit_code is not None:
+            return exit_code
         return entrypoint()
     except KeyboardInterrupt:
         return 2
@@ -1,19 +1,89 @@
-from .argument_parser import MisspellingArgumentParser
+from importlib import import_module
+from typing import Any
+
 from .files import expand_directories, parse_file_list
+from .ignore import IgnoreFile
+from .index import MisspellingIndex, compile_index, load_index, read_source
+from .lookup import MisspellingLookup
+from .matchers import DEFAULT_MATCHING_ENGINE, MATCHING_ENGINES, TokenizerMatcher, word_columns
+from .results import FileLimitExceeded, Misspelling
+from .sinks import CountSink, ResultSink, SedScriptSink, StreamSink, TextSink
+from .sniff import sniff, sniff_name
 from .suggestions import SuggestionGenerator
 from .version import __version__
-from .words import esc_file, esc_sed, get_a_line, normalize, same_case, split_words
+from .words import esc_file, esc_sed, get_a_line, normalize, same_case, split_words, tokenize, tokenize_with_columns
+
+# Only imported once used: the argument parser pulls in tap, the scan cache
+# hashlib, json and tempfile, the fixer difflib and tempfile, the JSON and
+# SARIF writers json, the git support subprocess and the server socket, none
+# of which library users checking files need.
+_LAZY_IMPORTS = {
+    "ChangedFile": ".git",
+    "CheckHooks": ".stats",
+    "FileStats": ".stats",
+    "FixSink": ".fixer",
+    "GitBlobReader": ".git",
+    "JsonLinesSink": ".writers",
+    "MisspellingArgumentParser": ".argument_parser",
+    "MisspellingServer": ".server",
+    "ScanCache": ".cache",
+    "SarifSink": ".writers",
+    "ScanStats": ".stats",
+    "collect_changes": ".git",
+    "create_sink": ".writers",
+}
 
 __all__ = [
+    "ChangedFile",
+    "CheckHooks",
+    "collect_changes",
+    "create_sink",
+    "CountSink",
+    "DEFAULT_MATCHING_ENGINE",
+    "MATCHING_ENGINES",
     "MisspellingArgumentParser",
+    "Misspelling",
+    "IgnoreFile",
+    "JsonLinesSink",
+    "MisspellingIndex",
+    "MisspellingLookup",
+    "MisspellingServer",
     "esc_file",
     "esc_sed",
+    "FileLimitExceeded",
+    "FileStats",
+    "FixSink",
+    "GitBlobReader",
+    "compile_index",
     "get_a_line",
+    "load_index",
     "normalize",
+    "read_source",
+    "ResultSink",
     "same_case",
+    "SarifSink",
+    "ScanCache",
+    "ScanStats",
+    "SedScriptSink",
+    "sniff",
+    "sniff_name",
+    "StreamSink",
     "SuggestionGenerator",
     "split_words",
+    "tokenize",
+    "tokenize_with_columns",
+    "TextSink",
+    "TokenizerMatcher",
     "expand_directories",
     "parse_file_list",
+    "word_columns",
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,6 +3,10 @@ from typing import List, Optional
 
 from tap import Tap
 
+from .matchers import DEFAULT_MATCHING_ENGINE, MATCHING_ENGINES
+from .sinks import DEFAULT_BUFFER_SIZE, FLUSH_POLICIES
+from .writers import OUTPUT_FORMATS
+
 
 class MisspellingArgumentParser(Tap):
     """
@@ -19,6 +23,30 @@ class MisspellingArgumentParser(Tap):
         Path
     ] = None  # Create a shell script to interactively correct the files - script saved to the given file
     export_file: Optional[Path] = None  # Export the list of misspelled words into a file
+    output_format: str = "text"  # Format of the results printed: text, JSON Lines or SARIF
+    buffer_size: int = DEFAULT_BUFFER_SIZE  # Number of characters of results gathered before each write
+    flush: str = "auto"  # Flush the results after each file, when the buffer is full, or after each file on a terminal
+    fix: bool = False  # Correct the misspellings having a single suggestion in place, writing each file once
+    dry_run: bool = False  # With --fix, print the corrections as a unified diff instead of writing the files
+    count: bool = False  # Only print the number of misspellings per word and per file
+    jobs: int = 1  # Number of processes used to check the files, 0 uses one per CPU
+    comments_only: bool = False  # Only check the comments, docstrings and string literals of source files
+    max_file_size: int = 0  # Skip the files larger than this many KB, 0 checks files of any size
+    max_line_length: int = 0  # Only check the first characters of longer lines, 0 checks whole lines
+    file_timeout: float = 0.0  # Stop checking a file after this many seconds, keeping what was found, 0 for no limit
+    fail_fast: bool = False  # Stop at the first misspelling found, e.g. when only a pass or fail matters
+    check_generated: bool = False  # Also check the generated and minified files, skipped like binary files otherwise
+    walk_threads: int = 0  # Threads listing directories ahead, e.g. on network filesystems, 0 lists them one by one
+    no_ignore: bool = False  # Also check the files matched by .gitignore and .misspellingignore files
+    engine: str = DEFAULT_MATCHING_ENGINE  # Engine used to match the words of each line against the misspellings
+    cache_dir: Optional[Path] = None  # Cache the results of unchanged files in this directory, e.g. .misspelling_cache
+    cache_max_size: int = 256  # Maximum size of the cache directory in MB
+    diff: Optional[str] = None  # Only check lines added or modified since this git revision or in this revision range
+    staged: bool = False  # Only check lines added or modified in the git index, as found in the index
+    stats: bool = False  # Print the time spent in each phase, counters and the slowest files to stderr
+    stats_slowest: int = 10  # Number of slowest files listed by --stats
+    serve: bool = False  # Keep the dictionary loaded and answer JSON lines requests on --socket, or stdin and stdout
+    socket: Optional[Path] = None  # Unix socket of the daemon, used to check the files when only files are given
     dump_misspelling: bool = False  # Dump the list of misspelled words
     version: bool = False  # Version of the misspellings package
     files: Optional[List[Path]] = None  # Files to check
@@ -29,3 +57,6 @@ class MisspellingArgumentParser(Tap):
             nargs="*",
             help="Files to check",
         )
+        self.add_argument("--engine", choices=list(MATCHING_ENGINES))
+        self.add_argument("--output-format", choices=list(OUTPUT_FORMATS))
+        self.add_argument("--flush", choices=list(FLUSH_POLICIES))
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from typing import List, Mapping, Optional, Tuple, Union
+
+# Bump whenever a change to the checker changes the results of a file.
+CACHE_VERSION = 3
+DEFAULT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+CachedResults = List[List[Union[int, str]]]
+# Hash of the path, stat of the file, hash of its content when it was looked up
+# and name of its results.
+CacheKey = Tuple[str, os.stat_result, str, str]
+
+
+def _hexdigest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def dictionary_digest(misspelling_dict: Mapping[str, List[str]]) -> str:
+    """Return a digest identifying the misspelled words and corrections of a dictionary."""
+    digest = getattr(misspelling_dict, "digest", None)
+    if digest is not None:
+        return digest.hex()
+    return _hexdigest(json.dumps(sorted(misspelling_dict.items())).encode("utf-8"))
+
+
+class ScanCache:
+    """
+    On-disk cache of the results of check(), so unchanged files aren't
+    scanned again.
+
+    Results are stored by content hash under a directory specific to the
+    dictionary, so they stay valid whatever the path or the mtime of a file
+    and the cache directory can be shared between machines as is. A second
+    entry per path remembers the size, mtime and content hash last seen for
+    it, which lets a file that wasn't touched be answered without opening it.
+
+    Every entry is written to a temporary file and renamed into place, and
+    missing or broken entries are just misses, so any number of processes can
+    use the same cache directory at once.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[pathlib.Path, str],
+        dictionary_digest: str,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ) -> None:
+        """
+        Args:
+          cache_dir: Directory holding the cache, created if needed.
+          dictionary_digest: Identifies the misspellings the results were found with.
+          max_size: Size in bytes above which the least recently used entries are evicted.
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+        self._root = self.cache_dir / f"v{CACHE_VERSION}-{dictionary_digest}"
+
+    def _entry_path(self, kind: str, key: str) -> pathlib.Path:
+        return self._root / kind / key[:2] / f"{key}.json"
+
+    def _read(self, path: pathlib.Path) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+        try:
+            # Keep track of when the entry was last used for the eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    @staticmethod
+    def _write(path: pathlib.Path, entry: dict) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        except OSError:
+            # A read-only or full cache must not fail the check.
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(tmp_name, path)
+        except OSError:
+            os.unlink(tmp_name)
+
+    def get(self, filename: Union[pathlib.Path, str], variant: str = "") -> Tuple[Optional[CachedResults], CacheKey]:
+        """
+        Look up the results of a file.
+
+        Args:
+          filename: The file to look up.
+          variant: Tells apart the results of the same content checked
+                   differently, as files of different types are.
+
+        Returns:
+          (results, key)
+          results: List of line number, column and misspelled word, None on a miss.
+          key: To be given to put() on a miss.
+
+        Raises:
+          IOError: Raised if filename can't be read.
+        """
+        path_key = _hexdigest(os.fsencode(filename))
+        stat = os.stat(filename)
+        entry = self._read(self._entry_path("files", path_key)) or {}
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            content_hash = entry["content"]
+        else:
+            with open(filename, "rb") as f:
+                content_hash = _hexdigest(f.read())
+        results_key = f"{content_hash}-{variant}" if variant else content_hash
+        results = (self._read(self._entry_path("results", results_key)) or {}).get("results")
+        key = (path_key, stat, content_hash, results_key)
+        if results is not None and entry.get("content") != content_hash:
+            self._write_file_entry(key)
+        return results, key
+
+    def put(self, key: CacheKey, results: CachedResults) -> None:
+        """Store the results of a file, key as returned by get() on a miss."""
+        self._write(self._entry_path("results", key[3]), {"results": results})
+        self._write_file_entry(key)
+
+    def _write_file_entry(self, key: CacheKey) -> None:
+        path_key, stat, content_hash, _ = key
+        self._write(
+            self._entry_path("files", path_key),
+            {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "content": content_hash},
+        )
+
+    def prune(self) -> None:
+        """Evict the least recently used entries of every dictionary until the cache fits in max_size."""
+        entries = []
+        total_size = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total_size -= size
+            # Leave some room so the next run doesn't have to evict right away.
+            if total_size <= self.max_size * 0.9:
+                break
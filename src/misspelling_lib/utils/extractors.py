@@ -0,0 +1,129 @@
+import io
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Returns the lines of a source file keeping only its comments and string
+# literals, the rest blanked out so the line numbers and columns stay right.
+Extractor = Callable[[str], List[str]]
+
+_C_LIKE_REGEX = re.compile(
+    r"""//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?|`(?:\\.|[^`\\])*`?""", re.DOTALL
+)
+# A "#" starts a comment at the start of a word only, not in $# or a#b.
+_SHELL_LIKE_REGEX = re.compile(r"""(?:^|(?<=[\s;]))#[^\n]*|"(?:\\.|[^"\\])*"?|'[^']*'?""", re.MULTILINE)
+
+
+def _keep_spans(text: str, spans: Iterable[Tuple[int, int]]) -> List[str]:
+    """Return the lines of text, each one only holding the parts of the spans on it, at the same columns."""
+    lines: List[List[str]] = [[] for _ in range(text.count("\n") + 1)]
+    widths = [0] * len(lines)
+    row = position = line_start = 0
+    for start, end in spans:
+        if text.count("\n", position, start):
+            row += text.count("\n", position, start)
+            line_start = text.rfind("\n", 0, start) + 1
+        column = start - line_start
+        for offset, part in enumerate(text[start:end].split("\n")):
+            if offset:
+                column = 0
+            if part:
+                # Blanks stand for what is left out.
+                lines[row + offset].append(" " * (column - widths[row + offset]) + part)
+                widths[row + offset] = column + len(part)
+        if text.count("\n", start, end):
+            row += text.count("\n", start, end)
+            line_start = text.rfind("\n", 0, end) + 1
+        position = end
+    if text.endswith("\n"):
+        # Not a line of its own when reading the file.
+        lines.pop()
+    return ["".join(parts) for parts in lines]
+
+
+def c_like_comments_and_strings(text: str) -> List[str]:
+    """Keep the // and /* */ comments and the "", '' and `` literals, as in C, Java, JavaScript, Go or Rust."""
+    return _keep_spans(text, (match.span() for match in _C_LIKE_REGEX.finditer(text)))
+
+
+def shell_like_comments_and_strings(text: str) -> List[str]:
+    """Keep the # comments and the "" and '' literals, as in shell scripts, Ruby or Perl."""
+    return _keep_spans(text, (match.span() for match in _SHELL_LIKE_REGEX.finditer(text)))
+
+
+def python_comments_and_strings(text: str) -> List[str]:
+    """Keep the comments and string literals, docstrings included, of Python code found by the tokenize module."""
+    import tokenize
+
+    kept_types = {tokenize.COMMENT, tokenize.STRING}
+    # Python 3.12 splits f-strings into several tokens.
+    if hasattr(tokenize, "FSTRING_MIDDLE"):
+        kept_types.add(tokenize.FSTRING_MIDDLE)
+
+    line_starts = [0]
+    for line in text.split("\n"):
+        line_starts.append(line_starts[-1] + len(line) + 1)
+    spans = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(text).readline):
+            if token.type in kept_types:
+                start = line_starts[token.start[0] - 1] + token.start[1]
+                end = line_starts[token.end[0] - 1] + token.end[1]
+                spans.append((start, end))
+    except (tokenize.TokenError, SyntaxError):
+        # Not valid Python, such as Python 2 code or a template: check all of it.
+        return _keep_spans(text, [(0, len(text))])
+    return _keep_spans(text, spans)
+
+
+EXTRACTORS_BY_SUFFIX: Dict[str, Extractor] = {
+    ".py": python_comments_and_strings,
+    ".pyi": python_comments_and_strings,
+    **dict.fromkeys(
+        (
+            ".c",
+            ".h",
+            ".cc",
+            ".cpp",
+            ".cxx",
+            ".hh",
+            ".hpp",
+            ".hxx",
+            ".cs",
+            ".java",
+            ".kt",
+            ".scala",
+            ".swift",
+            ".go",
+            ".rs",
+            ".js",
+            ".jsx",
+            ".mjs",
+            ".ts",
+            ".tsx",
+            ".php",
+            ".dart",
+        ),
+        c_like_comments_and_strings,
+    ),
+    **dict.fromkeys(
+        (".sh", ".bash", ".zsh", ".ksh", ".rb", ".pl", ".pm", ".r", ".tf", ".cmake"),
+        shell_like_comments_and_strings,
+    ),
+}
+EXTRACTORS_BY_NAME: Dict[str, Extractor] = {
+    "Makefile": shell_like_comments_and_strings,
+    "Dockerfile": shell_like_comments_and_strings,
+    "CMakeLists.txt": shell_like_comments_and_strings,
+    "Rakefile": shell_like_comments_and_strings,
+    "Gemfile": shell_like_comments_and_strings,
+}
+
+
+def find_extractor(filename: Union[os.PathLike, str]) -> Optional[Extractor]:
+    """Return the extractor of the comments and strings of a file by its name, None for prose or unknown files."""
+    name = os.path.basename(filename)
+    extractor = EXTRACTORS_BY_NAME.get(name)
+    if extractor is None:
+        extractor = EXTRACTORS_BY_SUFFIX.get(os.path.splitext(name)[1].lower())
+    return extractor
@@ -1,14 +1,37 @@
 import os
 import re
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Iterator, List, NoReturn, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, NoReturn, Optional, Tuple, Union
 
-EXCLUDED_FILES_RE = re.compile(r"\.(pyc|s?o|a|sh|txt|coverage|gitignore|python-version)|LICENSE$")
-DOT_EXCLUDED_DIRS_RE = re.compile(r"\.(git|github|mypy_cache|pytest_cache|idea|vscode|.local)")
-EXCLUDED_DIRS_RE = re.compile(
-    r"(\*egg|\*egg-info|CVS|bin|node_modules|__pycache__|json_sources|test_assets|_local|build|dist)"
+from .ignore import IGNORE_FILE_NAMES, IgnoreFile
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+EXCLUDED_FILES_RE = re.compile(r"\.(pyc|s?o|a|sh|txt|coverage|gitignore|misspellingignore|python-version)|LICENSE$")
+# Directories that aren't descended into, matched against their name only.
+EXCLUDED_DIR_NAMES = frozenset(
+    {
+        ".git",
+        ".github",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".idea",
+        ".vscode",
+        "CVS",
+        "bin",
+        "node_modules",
+        "__pycache__",
+        "json_sources",
+        "test_assets",
+        "build",
+        "dist",
+    }
 )
+EXCLUDED_DIR_SUFFIXES = (".egg", ".egg-info")
+EXCLUDED_DIR_PARTS = (".local", "_local")
 
 
 def parse_file_list(filename: Path) -> Union[List[Path], NoReturn]:
@@ -25,25 +48,189 @@ def parse_file_list(filename: Path) -> Union[List[Path], NoReturn]:
         raise err
 
 
-def expand_directories(path_list: List[Path], result_files: Optional[List[Path]] = None) -> Iterator[Path]:
-    """Return list with directories replaced their contained files."""
-
-    if result_files is None:
-        result_files = []
-
-    for path in path_list:
-        if path.is_dir():
-            for entry in os.scandir(path):
-                if (
-                    not entry.path.find(".local") > -1
-                    and not entry.path.find("_local") > -1
-                    and not DOT_EXCLUDED_DIRS_RE.search(entry.path)
-                    and not EXCLUDED_DIRS_RE.search(entry.path)
-                    and entry.is_dir()
-                ):
-                    expand_directories(path_list=[Path(entry.path)], result_files=result_files)
-                if entry.is_file() and not EXCLUDED_FILES_RE.search(entry.name):
-                    result_files.append(Path(entry.path))
-        else:
-            result_files.append(path)
-    return result_files
+def is_excluded_dir(name: str) -> bool:
+    """Return whether the directory of this name is skipped by expand_directories()."""
+    return (
+        name in EXCLUDED_DIR_NAMES
+        or name.endswith(EXCLUDED_DIR_SUFFIXES)
+        or any(part in name for part in EXCLUDED_DIR_PARTS)
+    )
+
+
+# The name of a listed file, or of a directory to descend into with its device and inode, None if unknown.
+_Entry = Tuple[str, bool, Optional[Tuple[int, int]]]
+
+
+def _identity(path: str) -> Optional[Tuple[int, int]]:
+    stat = os.stat(path)
+    # Zero on the filesystems without inode numbers, every directory is walked there.
+    return (stat.st_dev, stat.st_ino) if stat.st_ino else None
+
+
+# The ignore files applying to the entries of a directory, the deepest first, each one with the path of the
+# directory relative to its own: "" for the ignore files of the directory itself.
+_IgnoreStack = Tuple[Tuple[IgnoreFile, str], ...]
+
+
+def _ancestor_ignores(root: str) -> _IgnoreStack:
+    """Return the ignore files of the parent directories of root up to the top of its git work tree, if any."""
+    directory = os.path.abspath(root)
+    relative_path = ""
+    ancestors: List[Tuple[IgnoreFile, str]] = []
+    while True:
+        # Those of root itself are read along with its entries.
+        if relative_path:
+            ancestors.extend(_read_ignore_files(directory, relative_path))
+        git_dir = os.path.join(directory, ".git")
+        if os.path.exists(git_dir):
+            exclude = IgnoreFile.read(os.path.join(git_dir, "info", "exclude"))
+            if exclude is not None:
+                ancestors.append((exclude, relative_path))
+            return tuple(ancestors)
+        parent, name = os.path.split(directory)
+        if parent == directory:
+            # Not in a work tree, the ignore files of the parent directories don't apply.
+            return ()
+        relative_path = f"{name}/{relative_path}" if relative_path else name
+        directory = parent
+
+
+def _read_ignore_files(
+    directory: str, relative_path: str = "", names: Iterable[str] = IGNORE_FILE_NAMES
+) -> List[Tuple[IgnoreFile, str]]:
+    """Return the ignore files of a directory, the one taking precedence first."""
+    ignore_files = []
+    for name in reversed(IGNORE_FILE_NAMES):
+        if name not in names:
+            continue
+        ignore_file = IgnoreFile.read(os.path.join(directory, name))
+        if ignore_file is not None:
+            ignore_files.append((ignore_file, relative_path))
+    return ignore_files
+
+
+def _is_ignored(ignores: _IgnoreStack, name: str, is_dir: bool) -> bool:
+    for ignore_file, relative_path in ignores:
+        ignored = ignore_file.match(f"{relative_path}/{name}" if relative_path else name, is_dir)
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def _list_directory(path: str, ignores: Optional[_IgnoreStack]) -> Tuple[List[_Entry], Optional[_IgnoreStack]]:
+    """
+    Return the files to check and the directories to descend into, in the order of os.scandir(), and the ignore
+    files applying to them.
+
+    Args:
+      path: The directory.
+      ignores: The ignore files of the parent directories, None to read none.
+    """
+    entries = []
+    ignore_file_names = []
+    with os.scandir(path) as scandir:
+        for entry in scandir:
+            if entry.name in IGNORE_FILE_NAMES:
+                ignore_file_names.append(entry.name)
+            if entry.is_dir():
+                if not is_excluded_dir(entry.name):
+                    entries.append((entry.name, True, _identity(entry.path)))
+            elif entry.is_file() and not EXCLUDED_FILES_RE.search(entry.name):
+                entries.append((entry.name, False, None))
+    if ignores is None:
+        return entries, None
+
+    own_ignores = _read_ignore_files(path, names=ignore_file_names) if ignore_file_names else None
+    if own_ignores:
+        ignores = tuple(own_ignores) + ignores
+    if ignores:
+        # Ignored directories are left out here, before their entries are ever listed.
+        entries = [entry for entry in entries if not _is_ignored(ignores, entry[0], entry[1])]
+    return entries, ignores
+
+
+def _walk(root: Path, executor: Optional["Executor"], ignore_files: bool) -> Iterator[Path]:
+    """
+    Yield the files under root depth first, without recursion.
+
+    A directory reached again through a symbolic link is skipped, so links
+    looping back to a parent directory are walked once. With an executor, the
+    subdirectories of a directory are listed ahead in its threads while the
+    files are yielded, still in the same order.
+    """
+    if executor is None:
+        list_directory: Callable[..., Any] = _list_directory
+    else:
+        list_directory = partial(executor.submit, _list_directory)
+    visited = {_identity(str(root))} - {None}
+    root_ignores = _ancestor_ignores(str(root)) if ignore_files else None
+    # Each level holds the files and the listings of the subdirectories of a directory not yielded yet.
+    stack = [iter([(root, list_directory(str(root), root_ignores))])]
+    try:
+        while stack:
+            for path, listing in stack[-1]:
+                if listing is None:
+                    yield path
+                    continue
+                entries, ignores = listing if executor is None else listing.result()
+                children = []
+                for name, is_dir, identity in entries:
+                    # Joining a name to the Path of its directory is cheaper than parsing the whole path again.
+                    child = path / name
+                    if not is_dir:
+                        children.append((child, None))
+                    elif identity not in visited:
+                        if identity is not None:
+                            visited.add(identity)
+                        if ignores:
+                            child_ignores: Optional[_IgnoreStack] = tuple(
+                                (ignore_file, f"{relative_path}/{name}" if relative_path else name)
+                                for ignore_file, relative_path in ignores
+                            )
+                        else:
+                            child_ignores = ignores
+                        children.append((child, list_directory(str(child), child_ignores)))
+                stack.append(iter(children))
+                break
+            else:
+                stack.pop()
+    finally:
+        if executor is not None:
+            for level in stack:
+                for _, listing in level:
+                    if listing is not None:
+                        listing.cancel()
+
+
+def expand_directories(path_list: Iterable[Path], threads: int = 0, ignore_files: bool = True) -> Iterator[Path]:
+    """
+    Yield the paths with directories replaced by their contained files, as they are found.
+
+    Files and directories matched by the .gitignore and .misspellingignore
+    files of the walked directories are left out, as well as those of their
+    parent directories up to the top of the git work tree. Ignored
+    directories aren't walked at all. The files given in path_list are
+    always yielded.
+
+    Args:
+      path_list: Files and directories.
+      threads: Number of threads listing the directories ahead, which helps on network filesystems.
+        0 lists them one by one when they are reached.
+      ignore_files: Whether to read the ignore files.
+    """
+    if threads <= 0:
+        for path in path_list:
+            if path.is_dir():
+                yield from _walk(path, None, ignore_files)
+            else:
+                yield path
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for path in path_list:
+            if path.is_dir():
+                yield from _walk(path, executor, ignore_files)
+            else:
+                yield path
@@ -0,0 +1,199 @@
+import difflib
+import os
+import pathlib
+import re
+import stat
+import tempfile
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from .results import Misspelling
+from .sinks import ResultSink
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+# A line with its end, split as the checker counts lines: \r\n, \r or \n.
+_LINE_REGEX = re.compile(r".*?(?:\r\n|\r|\n)|.+", re.DOTALL)
+
+# Line number, column, misspelled word and its correction.
+Fix = Tuple[int, int, str, str]
+
+
+def apply_fixes(text: str, fixes: Iterable[Fix]) -> Tuple[str, int]:
+    """
+    Replace misspelled words by their corrections.
+
+    Args:
+      text: Content of a file.
+      fixes: Line number, column, word and correction of each misspelling.
+    Returns:
+      (text, count)
+      text: The corrected text.
+      count: Number of replacements made, less than the fixes if the text doesn't hold some of them at their column.
+    """
+    by_line: Dict[int, List[Tuple[int, str, str]]] = {}
+    for line_ct, column, word, correction in fixes:
+        by_line.setdefault(line_ct, []).append((column, word, correction))
+    lines = _LINE_REGEX.findall(text)
+    count = 0
+    for line_ct, line_fixes in by_line.items():
+        if not 0 < line_ct <= len(lines):
+            continue
+        line = lines[line_ct - 1]
+        # From the end of the line, so the columns of the other words stay valid.
+        for column, word, correction in sorted(line_fixes, reverse=True):
+            start = column - 1
+            if start >= 0 and line.startswith(word, start):
+                line = line[:start] + correction + line[start + len(word) :]
+                count += 1
+        lines[line_ct - 1] = line
+    return "".join(lines), count
+
+
+def replace_file(filename: Union[pathlib.Path, str], text: str) -> None:
+    """
+    Replace the content of a file at once: written to a temporary file next to it, then renamed over it.
+
+    The file keeps its permissions, and a symbolic link keeps pointing to it.
+    """
+    target = os.path.realpath(filename)
+    mode = stat.S_IMODE(os.stat(target).st_mode)
+    fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(text.encode("utf-8"))
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, target)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def unified_diff(filename: Union[pathlib.Path, str], text: str, fixed_text: str) -> str:
+    """Return the changes between text and fixed_text as a unified diff, as printed by --fix --dry-run."""
+    name = pathlib.Path(filename).as_posix()
+    diff = []
+    for line in difflib.unified_diff(
+        _LINE_REGEX.findall(text), _LINE_REGEX.findall(fixed_text), fromfile=f"a/{name}", tofile=f"b/{name}"
+    ):
+        diff.append(line)
+        if not line.endswith(("\n", "\r")):
+            diff.append("\n\\ No newline at end of file\n")
+    return "".join(diff)
+
+
+def fix_file(filename: Union[pathlib.Path, str], fixes: List[Fix], dry_run: bool = False) -> Tuple[str, int]:
+    """
+    Correct the misspellings of a file, writing it once.
+
+    Args:
+      filename: The file.
+      fixes: Line number, column, word and correction of each misspelling.
+      dry_run: Leave the file as it is.
+    Returns:
+      (diff, count)
+      diff: Unified diff of the changes, only computed in a dry run.
+      count: Number of replacements made.
+    Raises:
+      IOError: Raised if the file can't be read or written.
+      ValueError: Raised if the file isn't valid UTF-8.
+    """
+    with open(filename, "rb") as f:
+        text = f.read().decode("utf-8")
+    fixed_text, count = apply_fixes(text, fixes)
+    if dry_run:
+        return unified_diff(filename, text, fixed_text), count
+    if fixed_text != text:
+        replace_file(filename, fixed_text)
+    return "", count
+
+
+class FixSink(ResultSink):
+    """
+    Corrects the misspellings in place, each file rewritten once with all of its corrections, see --fix.
+
+    Only the misspellings with a single suggestion are corrected, in the case
+    of the misspelled word. A file is fixed once all of its results were
+    given, on a thread pool when there are several threads.
+    """
+
+    def __init__(self, diff_output: Optional[TextIO] = None, threads: int = 1, errors: Optional[TextIO] = None) -> None:
+        """
+        Args:
+          diff_output: Where to write the changes as a unified diff instead of writing the files, a dry run.
+          threads: Number of files fixed at the same time.
+          errors: Where the files that couldn't be read or fixed are written, None to leave them out.
+        """
+        self.diff_output = diff_output
+        self.threads = threads
+        self.errors = errors
+        # Number of replacements made, or that would be made in a dry run.
+        self.fixed = 0
+        # Misspellings left as they are, having several suggestions.
+        self.unfixed = 0
+        # Files that couldn't be read or fixed.
+        self.failed = 0
+        self._fixes: Dict[Union[pathlib.Path, str], List[Fix]] = {}
+        self._executor = None
+        self._pending: Deque[Tuple[Union[pathlib.Path, str], "Future"]] = deque()
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, line_ct, word, column = result
+        suggestions = self.lookup.suggestions(word)
+        if len(suggestions) != 1:
+            self.unfixed += 1
+        elif suggestions[0] != word:
+            self._fixes.setdefault(filename, []).append((line_ct, column, word, suggestions[0]))
+
+    def end_file(self, filename: pathlib.Path) -> None:
+        fixes = self._fixes.pop(filename, None)
+        if not fixes:
+            return
+        if self.threads <= 1:
+            try:
+                self._done(fix_file(filename, fixes, self.diff_output is not None))
+            except (IOError, ValueError) as error:
+                self._failed(filename, error)
+            return
+
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        self._pending.append((filename, self._executor.submit(fix_file, filename, fixes, self.diff_output is not None)))
+        # The diffs are written in the order of the files.
+        while self._pending and self._pending[0][1].done():
+            self._collect()
+
+    def _collect(self) -> None:
+        filename, future = self._pending.popleft()
+        try:
+            self._done(future.result())
+        except (IOError, ValueError) as error:
+            self._failed(filename, error)
+
+    def _done(self, outcome: Tuple[str, int]) -> None:
+        diff, count = outcome
+        self.fixed += count
+        if self.diff_output is not None and diff:
+            self.diff_output.write(diff)
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        self.failed += 1
+        if self.errors is not None:
+            self.errors.write(f"ERROR: {error}\n")
+
+    def _failed(self, filename: pathlib.Path, error: Exception) -> None:
+        self.failed += 1
+        if self.errors is not None:
+            self.errors.write(f"ERROR: {filename} couldn't be fixed: {error}\n")
+
+    def finish(self) -> None:
+        while self._pending:
+            self._collect()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.diff_output is not None:
+            self.diff_output.flush()
@@ -0,0 +1,143 @@
+import codecs
+import os
+import pathlib
+import re
+import subprocess
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+_HUNK_REGEX = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+class ChangedFile(NamedTuple):
+    """Lines added or modified in a file and, unless it's the working tree copy, its content."""
+
+    lines: FrozenSet[int]
+    content: Optional[bytes] = None
+
+
+def _git(args: List[str], cwd: Optional[pathlib.Path] = None) -> bytes:
+    try:
+        process = subprocess.run(["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as exception:
+        raise IOError(f"Unable to run git: {exception}") from exception
+    if process.returncode:
+        raise IOError(f"git {args[0]} failed: {process.stderr.decode(errors='replace').strip()}")
+    return process.stdout
+
+
+def _diff_path(line: bytes) -> Optional[str]:
+    """Return the path of a "+++ b/path" line of a diff, None for deleted files."""
+    # git ends the line with a tab when the path holds a space, a path with a tab is quoted.
+    path = line[4:].rstrip(b"\n").rstrip(b"\t")
+    if path == b"/dev/null":
+        return None
+    if path.startswith(b'"'):
+        # Paths with special characters are quoted C style.
+        path = codecs.escape_decode(path[1:-1])[0]
+    return os.fsdecode(path[2:])
+
+
+def parse_diff(diff: bytes) -> Dict[str, Set[int]]:
+    """Return the added or modified line numbers of each file of a unified diff."""
+    changed: Dict[str, Set[int]] = {}
+    lines: Optional[Set[int]] = None
+    for line in diff.splitlines(keepends=True):
+        if line.startswith(b"+++ "):
+            path = _diff_path(line)
+            lines = None if path is None else changed.setdefault(path, set())
+        elif line.startswith(b"@@") and lines is not None:
+            match = _HUNK_REGEX.match(line.decode("utf-8", "replace"))
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                lines.update(range(start, start + count))
+    return {path: lines for path, lines in changed.items() if lines}
+
+
+class GitBlobReader:
+    """
+    Reads objects through a single long-lived "git cat-file --batch" process,
+    rather than starting a process per file.
+    """
+
+    def __init__(self, cwd: Optional[pathlib.Path] = None) -> None:
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def __enter__(self) -> "GitBlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self, object_name: str) -> bytes:
+        """
+        Return the content of an object such as ":path" for the index or "rev:path".
+
+        Raises:
+          IOError: Raised if the object doesn't exist.
+        """
+        self._process.stdin.write(object_name.encode("utf-8") + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline()
+        if not header or header.endswith(b" missing\n"):
+            raise IOError(f"git object {object_name} is missing")
+        size = int(header.split()[2])
+        content = self._process.stdout.read(size)
+        self._process.stdout.read(1)
+        return content
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+
+
+def collect_changes(
+    diff: Optional[str] = None, staged: bool = False, paths: Iterable[pathlib.Path] = ()
+) -> Dict[pathlib.Path, ChangedFile]:
+    """
+    Return the files changed in git along with their added or modified lines.
+
+    Args:
+      diff: Revision or revision range given to git diff. A single revision is
+            compared with the working tree, a range is read from its end.
+      staged: Compare the index with HEAD instead, the content being read from the index.
+      paths: Limit the changes to these paths.
+
+    Raises:
+      IOError: Raised if git fails, for instance outside of a repository.
+    """
+    top_level = pathlib.Path(os.fsdecode(_git(["rev-parse", "--show-toplevel"]).strip()))
+    # The prefixes are given as _diff_path() expects them, whatever diff.noprefix or diff.mnemonicPrefix say.
+    diff_args = [
+        "diff",
+        "--no-color",
+        "--no-ext-diff",
+        "--unified=0",
+        "--diff-filter=d",
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+    ]
+    if staged:
+        diff_args.append("--cached")
+        object_prefix = ":"
+    elif diff and ".." in diff:
+        diff_args.append(diff)
+        object_prefix = (re.split(r"\.\.\.?", diff, maxsplit=1)[1] or "HEAD") + ":"
+    else:
+        diff_args.append(diff or "HEAD")
+        object_prefix = None
+    diff_args += ["--", *(os.path.abspath(path) for path in paths)]
+    changed = parse_diff(_git(diff_args, cwd=top_level))
+
+    changes = {}
+    reader = GitBlobReader(cwd=top_level) if object_prefix is not None and changed else None
+    try:
+        for path, lines in sorted(changed.items()):
+            content = reader.read(object_prefix + path) if reader is not None else None
+            changes[pathlib.Path(os.path.relpath(top_level / path))] = ChangedFile(frozenset(lines), content)
+    finally:
+        if reader is not None:
+            reader.close()
+    return changes
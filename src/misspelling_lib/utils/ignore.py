@@ -0,0 +1,128 @@
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+# Ignore files read in each walked directory, the last one taking precedence.
+IGNORE_FILE_NAMES = (".gitignore", ".misspellingignore")
+
+
+def _translate(pattern: str) -> str:
+    """Return the regular expression matching the paths relative to the ignore file of a gitignore pattern."""
+    # A slash anywhere but at the end anchors the pattern to the directory of the ignore file.
+    anchored = "/" in pattern
+    if pattern.startswith("/"):
+        pattern = pattern[1:]
+    if pattern.startswith("**/"):
+        pattern, anchored = pattern[3:], False
+
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("/**/", index):
+            parts.append("/(?:.*/)?")
+            index += 4
+            continue
+        if pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("/.*")
+            break
+        if char == "*":
+            parts.append("[^/]*")
+            while index + 1 < len(pattern) and pattern[index + 1] == "*":
+                index += 1
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                content = pattern[index + 1 : end]
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                parts.append("[" + content.replace("\\", "\\\\").replace("[", "\\[") + "]")
+                index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return ("" if anchored else "(?:.*/)?") + "".join(parts)
+
+
+class IgnoreFile:
+    """
+    The patterns of a .gitignore or .misspellingignore file, see expand_directories().
+
+    Follows the gitignore syntax: "#" comments, "!" negations, a trailing "/"
+    for directories only, a slash elsewhere anchoring the pattern to the
+    directory of the file, "*", "?", "[...]" and "**". The last pattern
+    matching a path decides whether it is ignored.
+    """
+
+    __slots__ = ("_file_regex", "_dir_regex", "_file_negated", "_dir_negated")
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        """
+        Args:
+          lines: Lines of the ignore file.
+        """
+        file_patterns: List[Tuple[str, bool]] = []
+        dir_patterns: List[Tuple[str, bool]] = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line.endswith(" ") and not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directories_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            pattern = (_translate(line), negated)
+            dir_patterns.append(pattern)
+            if not directories_only:
+                file_patterns.append(pattern)
+        self._file_regex, self._file_negated = self._compile(file_patterns)
+        self._dir_regex, self._dir_negated = self._compile(dir_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[Tuple[str, bool]]) -> Tuple[Optional[Pattern[str]], Tuple[bool, ...]]:
+        """
+        Return a regular expression with a group per pattern, the last pattern first so the group of a match is the
+        pattern deciding, and whether the pattern of each group is negated.
+        """
+        if not patterns:
+            return None, ()
+        patterns = patterns[::-1]
+        regex = re.compile("|".join(f"({pattern})\\Z" for pattern, _ in patterns), re.DOTALL)
+        # Groups are numbered from 1.
+        return regex, (False,) + tuple(negated for _, negated in patterns)
+
+    @classmethod
+    def read(cls, filename: str) -> Optional["IgnoreFile"]:
+        """Return the patterns of an ignore file, None if it can't be read or has none."""
+        try:
+            with open(filename, "r", encoding="utf-8", errors="replace") as f:
+                ignore_file = cls(f)
+        except OSError:
+            return None
+        return ignore_file if ignore_file._dir_regex is not None else None
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Args:
+          relative_path: Path relative to the directory of the ignore file, with "/" separators.
+          is_dir: Whether the path is a directory.
+        Returns:
+          Whether the path is ignored, None if no pattern matches it.
+        """
+        if is_dir:
+            regex, negated = self._dir_regex, self._dir_negated
+        else:
+            regex, negated = self._file_regex, self._file_negated
+        match = regex.match(relative_path) if regex is not None else None
+        return None if match is None else not negated[match.lastindex]
@@ -0,0 +1,260 @@
+import collections
+import mmap
+import os
+import pathlib
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+INDEX_MAGIC = b"MSPI"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".msidx"
+# Magic, version, entry count, hash table size and the digest of the sources.
+_HEADER = struct.Struct("<4sHxxII16s")
+# Offset and length of the word, then of its "\n" separated corrections.
+_ENTRY = struct.Struct("<IIII")
+_SLOT = struct.Struct("<I")
+# Number of looked up words whose presence is remembered. Source files use a
+# limited vocabulary, so this keeps the per token cost close to a dict lookup.
+_KNOWN_WORDS_SIZE = 1 << 16
+
+
+def sources_digest(sources: Iterable[Union[pathlib.Path, str]]) -> bytes:
+    """
+    Return a digest of the names and contents of the dictionary sources.
+
+    It only has to notice edited sources, so zlib checksums are used rather
+    than hashlib, which alone takes longer to import than loading an index.
+    """
+    size, crc, adler = 0, 0, 1
+    for source in sorted(pathlib.Path(s) for s in sources):
+        for data in (source.name.encode("utf-8") + b"\0", source.read_bytes()):
+            size += len(data)
+            crc = zlib.crc32(data, crc)
+            adler = zlib.adler32(data, adler)
+    return struct.pack("<QII", size, crc, adler)
+
+
+def read_source(source: Union[pathlib.Path, str]) -> Dict[str, List[str]]:
+    """
+    Read misspelled words and their corrections from a dictionary source.
+
+    JSON files map each word to a list of corrections, any other file has a
+    word per line either in the Wikipedia "word->correction, correction"
+    format or in the "word correction" format of MisspellingFileDetector.
+
+    Raises:
+      IOError: Raised if source can't be read.
+      ValueError: Raised if source isn't correctly formatted.
+    """
+    source = pathlib.Path(source)
+    if source.suffix == ".json":
+        import json
+
+        with open(source, "r", encoding="utf-8") as f:
+            return {word: list(corrections) for word, corrections in json.load(f).items()}
+
+    misspelling_dict = collections.defaultdict(list)
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            if "->" in line:
+                bad_word, corrections = line.strip().split("->", 1)
+                misspelling_dict[bad_word].extend(w.strip() for w in corrections.split(",") if w.strip())
+            else:
+                bad_word, correction = line.strip().split(" ", 1)
+                misspelling_dict[bad_word].append(correction)
+    return dict(misspelling_dict)
+
+
+def build_index(misspelling_dict: Mapping[str, List[str]], digest: bytes = b"\0" * 16) -> bytes:
+    """Serialise misspelled words and their corrections into an index."""
+    words = sorted(misspelling_dict)
+    table_size = 1
+    while table_size < 2 * len(words):
+        table_size *= 2
+
+    strings = bytearray()
+    entries = bytearray()
+    table = [0] * table_size
+    for number, word in enumerate(words, start=1):
+        encoded_word = word.encode("utf-8")
+        encoded_corrections = "\n".join(misspelling_dict[word]).encode("utf-8")
+        entries += _ENTRY.pack(
+            len(strings), len(encoded_word), len(strings) + len(encoded_word), len(encoded_corrections)
+        )
+        strings += encoded_word + encoded_corrections
+
+        slot = zlib.crc32(encoded_word) & (table_size - 1)
+        while table[slot]:
+            slot = (slot + 1) & (table_size - 1)
+        table[slot] = number
+
+    header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(words), table_size, digest)
+    return header + bytes(entries) + struct.pack("<%dI" % table_size, *table) + bytes(strings)
+
+
+def compile_index(sources: Iterable[Union[pathlib.Path, str]], output: Union[pathlib.Path, str]) -> pathlib.Path:
+    """
+    Compile dictionary sources into an index file.
+
+    The file is written to a temporary file first and renamed into place, so
+    readers never see a partially written index.
+    """
+    import tempfile
+
+    sources = list(sources)
+    misspelling_dict = {}
+    for source in sources:
+        misspelling_dict.update(read_source(source))
+    output = pathlib.Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=output.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(build_index(misspelling_dict, sources_digest(sources)))
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, output)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return output
+
+
+class MisspellingIndex(Mapping[str, List[str]]):
+    """
+    Read-only mapping of misspelled words to their corrections, backed by a
+    compiled index.
+
+    Words are found through the hash table stored in the index and only the
+    corrections of words that are actually looked up are decoded, so opening
+    an index costs no parsing at all. The outcome of the most recent lookups
+    is remembered, as the same words come up again and again in a file.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], path: Optional[pathlib.Path] = None) -> None:
+        """
+        Args:
+          buffer: The contents of the index.
+          path: The file buffer was mapped from, if any.
+
+        Raises:
+          ValueError: Raised if buffer isn't an index of a supported version.
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Truncated misspelling index.")
+        magic, version, self._count, self._table_size, self.digest = _HEADER.unpack_from(buffer)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError("Not a misspelling index of version %d." % INDEX_VERSION)
+        self._buffer = buffer
+        self._path = path
+        self._entries_offset = _HEADER.size
+        self._table_offset = self._entries_offset + self._count * _ENTRY.size
+        self._strings_offset = self._table_offset + self._table_size * _SLOT.size
+        self._known_words: Dict[str, bool] = {}
+
+    @classmethod
+    def open(cls, path: Union[pathlib.Path, str]) -> "MisspellingIndex":
+        """Memory-map an index file."""
+        path = pathlib.Path(path)
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    def __reduce__(self):
+        # mmap objects can't be pickled, so map the file again on the other side.
+        if self._path is not None:
+            return self.open, (self._path,)
+        return self.__class__, (bytes(self._buffer),)
+
+    def _entry(self, number: int) -> tuple:
+        return _ENTRY.unpack_from(self._buffer, self._entries_offset + number * _ENTRY.size)
+
+    def _find(self, word: str) -> int:
+        """Return the entry number of word or -1."""
+        encoded_word = word.encode("utf-8", "surrogatepass")
+        buffer = self._buffer
+        mask = self._table_size - 1
+        slot = zlib.crc32(encoded_word) & mask
+        while True:
+            (number,) = _SLOT.unpack_from(buffer, self._table_offset + slot * _SLOT.size)
+            if not number:
+                return -1
+            word_offset, word_length, _, _ = self._entry(number - 1)
+            start = self._strings_offset + word_offset
+            if buffer[start : start + word_length] == encoded_word:
+                return number - 1
+            slot = (slot + 1) & mask
+
+    def __contains__(self, word: object) -> bool:
+        try:
+            return self._known_words[word]
+        except (KeyError, TypeError):
+            pass
+        if not isinstance(word, str):
+            return False
+        if len(self._known_words) >= _KNOWN_WORDS_SIZE:
+            self._known_words.clear()
+        found = self._known_words[word] = self._find(word) >= 0
+        return found
+
+    def __getitem__(self, word: str) -> List[str]:
+        number = self._find(word) if isinstance(word, str) else -1
+        if number < 0:
+            raise KeyError(word)
+        _, _, corrections_offset, corrections_length = self._entry(number)
+        start = self._strings_offset + corrections_offset
+        corrections = self._buffer[start : start + corrections_length].decode("utf-8")
+        return corrections.split("\n") if corrections else []
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = self._buffer
+        for number in range(self._count):
+            word_offset, word_length, _, _ = self._entry(number)
+            start = self._strings_offset + word_offset
+            yield buffer[start : start + word_length].decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def default_cache_dir() -> pathlib.Path:
+    """Directory where indexes compiled at run time are kept."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return pathlib.Path(cache_home) / "misspellings"
+
+
+def load_index(
+    sources: List[pathlib.Path],
+    packaged_index: Optional[pathlib.Path] = None,
+    cache_dir: Optional[pathlib.Path] = None,
+) -> MisspellingIndex:
+    """
+    Return the index of the dictionary sources, compiling it only if needed.
+
+    The packaged index is used if it was compiled from the current sources,
+    otherwise an index named after the digest of the sources is looked up in
+    cache_dir and compiled there when it's missing, so changing a source
+    rebuilds the cache automatically. When the cache directory isn't
+    writable the index is built in memory.
+    """
+    digest = sources_digest(sources)
+    if packaged_index is not None:
+        try:
+            index = MisspellingIndex.open(packaged_index)
+        except (IOError, ValueError):
+            pass
+        else:
+            if index.digest == digest:
+                return index
+
+    cache_file = (cache_dir or default_cache_dir()) / ("dictionary-%s%s" % (digest.hex(), INDEX_SUFFIX))
+    try:
+        return MisspellingIndex.open(cache_file)
+    except (IOError, ValueError):
+        pass
+    try:
+        return MisspellingIndex.open(compile_index(sources, cache_file))
+    except IOError:
+        misspelling_dict = {}
+        for source in sources:
+            misspelling_dict.update(read_source(source))
+        return MisspellingIndex(build_index(misspelling_dict, digest))
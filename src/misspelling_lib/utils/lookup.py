@@ -0,0 +1,110 @@
+import itertools
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+from .words import same_case
+
+
+def word_variants(bad_word: str) -> Iterator[str]:
+    """Yield every word of a line that is looked up as bad_word."""
+    if bad_word.lower() != bad_word:
+        yield bad_word
+        return
+    # Lower case entries also match the words whose lower() is the entry.
+    # Only the first letter can be ASCII upper case, otherwise the word
+    # would have been split in two.
+    options = []
+    for position, char in enumerate(bad_word):
+        upper = char.upper()
+        if len(upper) == 1 and upper != char and (position == 0 or not upper.isascii()):
+            options.append((char, upper))
+        else:
+            options.append((char,))
+    for variant in itertools.product(*options):
+        yield "".join(variant)
+
+
+def _suggestions(misspelling_dict: Mapping[str, List[str]], word: str) -> Tuple[str, ...]:
+    corrections = set(misspelling_dict.get(word, ())).union(misspelling_dict.get(word.lower(), ()))
+    return tuple(sorted(same_case(source=word, destination=w) for w in corrections))
+
+
+def _is_variant(word: str, bad_word: str) -> bool:
+    """Return whether word is one of the word_variants() of bad_word, the lower case of word."""
+    if len(word) != len(bad_word):
+        return False
+    for position, (char, bad_char) in enumerate(zip(word, bad_word)):
+        if char != bad_char and (char != bad_char.upper() or (position and char.isascii())):
+            return False
+    return True
+
+
+class MisspellingLookup(Mapping[str, Tuple[str, ...]]):
+    """
+    Index of every word reported as misspelled, case variants included, each
+    with its suggestions sorted and in the case of the word.
+
+    Nothing is computed up front: a word is resolved against the dictionary
+    when it's looked up, and its suggestions are computed the first time
+    they're asked for, then kept however many times it's misspelled.
+    """
+
+    __slots__ = ("_misspelling_dict", "_suggestions", "_quoted_suggestions", "_shared")
+
+    def __init__(self, misspelling_dict: Mapping[str, List[str]]) -> None:
+        """
+        Args:
+          misspelling_dict: Misspelled words and their corrections, only read here.
+        """
+        self._misspelling_dict = misspelling_dict
+        self._suggestions: Dict[str, Tuple[str, ...]] = {}
+        self._quoted_suggestions: Dict[str, str] = {}
+        # Many words share the same suggestions, keep a single tuple for them.
+        self._shared: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def __contains__(self, word: object) -> bool:
+        if word in self._suggestions or word in self._misspelling_dict:
+            return True
+        if not isinstance(word, str):
+            return False
+        lower = word.lower()
+        return lower != word and lower in self._misspelling_dict and _is_variant(word, lower)
+
+    def __getitem__(self, word: str) -> Tuple[str, ...]:
+        try:
+            return self._suggestions[word]
+        except KeyError:
+            if word not in self:
+                raise
+        suggestions = _suggestions(self._misspelling_dict, word)
+        suggestions = self._suggestions[word] = self._shared.setdefault(suggestions, suggestions)
+        return suggestions
+
+    def __iter__(self) -> Iterator[str]:
+        # Each variant is yielded once, as the first entry it comes from.
+        seen = set()
+        for bad_word in self._misspelling_dict:
+            for word in word_variants(bad_word):
+                if word not in seen:
+                    seen.add(word)
+                    yield word
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def suggestions(self, word: str) -> Tuple[str, ...]:
+        """Return the suggested replacements of a word, empty if it isn't misspelled."""
+        try:
+            return self[word]
+        except KeyError:
+            # Not a word of a line, such as "TEH", so not worth keeping.
+            return _suggestions(self._misspelling_dict, word)
+
+    def quoted_suggestions(self, word: str) -> str:
+        """Return the suggestions of a word as printed in the results: "one","two"."""
+        try:
+            return self._quoted_suggestions[word]
+        except KeyError:
+            quoted = ",".join('"%s"' % w for w in self.suggestions(word))
+            if word in self._suggestions:
+                self._quoted_suggestions[word] = quoted
+            return quoted
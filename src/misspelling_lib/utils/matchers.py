@@ -0,0 +1,91 @@
+import copy
+from typing import Container, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from .lookup import MisspellingLookup
+from .words import _word_shape_regex, tokenize
+
+# Distinct words whose lookup TokenizerMatcher remembers.
+FOUND_MEMO_SIZE = 1 << 20
+
+
+def word_columns(line: str, words: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Yield the column, counted from 1, of each word found in line by a matcher, in the same order."""
+    words = iter(words)
+    word = next(words, None)
+    if word is None:
+        return
+    for match in _word_shape_regex(line).finditer(line):
+        if match.group() == word:
+            yield match.start() + 1, word
+            word = next(words, None)
+            if word is None:
+                return
+
+
+class _Matcher:
+    _lookup: Container[str]
+
+    def with_lookup(self, lookup: Container[str]):
+        """Return the same matcher, probing lookup for the words instead, e.g. to count the probes."""
+        matcher = copy.copy(self)
+        matcher._lookup = lookup
+        return matcher
+
+    def find_words(self, line: str) -> Iterator[str]:
+        """Yield the misspelled words of a line."""
+        raise NotImplementedError
+
+    def find_word_columns(self, line: str) -> Iterator[Tuple[int, str]]:
+        """Yield the column, counted from 1, and the word of each misspelling of a line."""
+        return word_columns(line, self.find_words(line))
+
+
+def _as_lookup(misspelling_dict: Mapping[str, List[str]]) -> MisspellingLookup:
+    if isinstance(misspelling_dict, MisspellingLookup):
+        return misspelling_dict
+    return MisspellingLookup(misspelling_dict)
+
+
+class TokenizerMatcher(_Matcher):
+    """Splits each line into words and looks every one of them up."""
+
+    def __init__(self, misspelling_dict: Mapping[str, List[str]]) -> None:
+        self._lookup = _as_lookup(misspelling_dict)
+        # Whether each word seen so far is misspelled, so a word is only
+        # resolved against the dictionary the first time.
+        self._found: Dict[str, bool] = {}
+
+    def with_lookup(self, lookup: Container[str]):
+        matcher = super().with_lookup(lookup)
+        # Every word reaches the new lookup.
+        matcher._found = {}
+        return matcher
+
+    def find_words(self, line: str) -> Iterator[str]:
+        """Yield the misspelled words of a line."""
+        lookup = self._lookup
+        found = self._found
+        for word in tokenize(line):
+            misspelled = found.get(word)
+            if misspelled is None:
+                # The lookup holds the case variants of the words, only a few
+                # non-ASCII letters like the Kelvin sign need lower() as well.
+                misspelled = word in lookup or (not word.isascii() and word.lower() in lookup)
+                if len(found) >= FOUND_MEMO_SIZE:
+                    found.clear()
+                found[word] = misspelled
+            if misspelled:
+                yield word
+
+    def find_word_columns(self, line: str) -> Iterator[Tuple[int, str]]:
+        """Yield the column, counted from 1, and the word of each misspelling of a line."""
+        words = list(self.find_words(line))
+        # Most lines have none, only those with a misspelling are searched for their columns.
+        if words:
+            yield from word_columns(line, words)
+
+
+MATCHING_ENGINES = {
+    "tokenizer": TokenizerMatcher,
+}
+DEFAULT_MATCHING_ENGINE = "tokenizer"
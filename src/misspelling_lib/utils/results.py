@@ -0,0 +1,42 @@
+import pathlib
+from typing import NamedTuple, Union
+
+
+class Misspelling(NamedTuple):
+    """
+    A misspelled word found in a file.
+
+    A plain tuple underneath, without a __dict__, so millions of them stay
+    small. The checker interns the words, so a word found many times is
+    stored once.
+    """
+
+    filename: Union[pathlib.Path, str]
+    line: int
+    word: str
+    # Counted in characters from 1, as returned by MisspellingChecker.check_text().
+    column: int
+
+
+class FileLimitExceeded(Exception):
+    """
+    A file went over a limit set by MisspellingChecker.set_limits(): it was
+    skipped, or only checked up to the line reached in time.
+
+    Reported with the file access errors, the results found before it are kept.
+    """
+
+    def __init__(self, filename: Union[pathlib.Path, str], reason: str, detail: str) -> None:
+        """
+        Args:
+          filename: The file.
+          reason: The limit it went over: "too large" or "timed out".
+          detail: What happened to the file.
+        """
+        super().__init__(filename, reason, detail)
+        self.filename = filename
+        self.reason = reason
+        self.detail = detail
+
+    def __str__(self) -> str:
+        return f"{self.filename}: {self.reason}, {self.detail}"
@@ -0,0 +1,225 @@
+import json
+import os
+import pathlib
+import socket
+import threading
+from typing import IO, TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+
+from .files import expand_directories
+
+if TYPE_CHECKING:
+    from ..misspelling_checker import MisspellingChecker
+
+# How long a client waits for a daemon to accept its connection before
+# checking the files itself.
+CONNECT_TIMEOUT = 0.5
+
+
+def _result_to_json(
+    checker: "MisspellingChecker", filename: Union[pathlib.Path, str], line_ct: int, column: int, word: str
+) -> dict:
+    return {
+        "filename": str(filename),
+        "line": line_ct,
+        "column": column,
+        "word": word,
+        "suggestions": list(checker.lookup.suggestions(word)),
+    }
+
+
+def _is_path(path: object) -> bool:
+    return isinstance(path, str) and "\0" not in path
+
+
+class MisspellingServer:
+    """
+    Answers requests with a checker loaded once, one JSON object per line.
+
+    Requests:
+      {"id": 1, "paths": ["src", "README.md"], "cwd": "/project"}
+        Check files, directories are walked. Relative paths are relative to
+        cwd, or to the working directory of the server without it.
+      {"id": 2, "text": "Some teh text", "name": "message"}
+        Check inline text, reported as the file name.
+      {"id": 3, "command": "ping"}
+
+    Each request is answered with the same id and "results", a list of
+    {"filename", "line", "column", "word", "suggestions"}, and "errors", a list of
+    messages, or just "error" for a request that can't be understood.
+
+    The dictionary files are checked before each request and the checker is
+    created again when one of them changed. Requests of any number of
+    clients are answered concurrently by the same checker.
+    """
+
+    def __init__(self, create_checker: Callable[[], "MisspellingChecker"]) -> None:
+        """
+        Args:
+          create_checker: Called to create the checker, again whenever its dictionary files change.
+        """
+        self._create_checker = create_checker
+        self._lock = threading.Lock()
+        self._checker, self._dictionary_stamp = self._load()
+
+    def _load(self) -> Tuple["MisspellingChecker", tuple]:
+        checker = self._create_checker()
+        # Build everything lazy up front, so the first request is fast as well.
+        checker.matcher
+        return checker, self._stamp(checker.dictionary_files)
+
+    @staticmethod
+    def _stamp(paths: List[pathlib.Path]) -> tuple:
+        stamp = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamp.append(None)
+            else:
+                stamp.append((stat.st_size, stat.st_mtime_ns))
+        return tuple(stamp)
+
+    @property
+    def checker(self) -> "MisspellingChecker":
+        """The checker, created again first if its dictionary files changed."""
+        with self._lock:
+            if self._stamp(self._checker.dictionary_files) != self._dictionary_stamp:
+                try:
+                    self._checker, self._dictionary_stamp = self._load()
+                except (IOError, ValueError):
+                    # Probably being written, keep the current words until the next request.
+                    pass
+            return self._checker
+
+    def handle(self, request: dict) -> dict:
+        """Return the response to a request."""
+        response: Dict[str, object] = {"id": request.get("id")}
+        if request.get("command") == "ping":
+            response["pong"] = True
+            return response
+
+        checker = self.checker
+        results: List[dict] = []
+        errors: List[str] = []
+        if isinstance(request.get("text"), str):
+            name = str(request.get("name", "<text>"))
+            for line_ct, column, word in checker.check_text(request["text"]):
+                results.append(_result_to_json(checker, name, line_ct, column, word))
+        elif isinstance(request.get("paths"), list):
+            if not all(_is_path(path) for path in request["paths"] + [request.get("cwd") or "."]):
+                response["error"] = '"paths" and "cwd" are strings without NUL characters.'
+                return response
+            cwd = request.get("cwd") or os.getcwd()
+            # Files are read by absolute path but reported as the client named them.
+            names = {}
+            for path in request["paths"]:
+                for filename in expand_directories([pathlib.Path(cwd, path)]):
+                    names[filename] = filename if os.path.isabs(path) else pathlib.Path(os.path.relpath(filename, cwd))
+            for filename, file_errors, file_results in checker.check_many(names):
+                results.extend(
+                    _result_to_json(checker, names[filename], line_ct, column, word)
+                    for _, line_ct, word, column in file_results
+                )
+                errors.extend(str(error) for error in file_errors)
+        else:
+            response["error"] = 'A request needs "paths", "text" or "command".'
+            return response
+        response["results"] = results
+        response["errors"] = errors
+        return response
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Return the response line to a request line."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request is a JSON object")
+        except ValueError as exception:
+            response = {"id": None, "error": f"Invalid request: {exception}"}
+        else:
+            try:
+                response = self.handle(request)
+            except Exception as exception:
+                # One bad request mustn't stop the server answering the others.
+                response = {"id": request.get("id"), "error": f"Request failed: {exception!r}"}
+        return json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def serve_stream(self, input_stream: IO[bytes], output_stream: IO[bytes]) -> None:
+        """Answer the requests read from input_stream until it's closed, e.g. stdin and stdout."""
+        for line in input_stream:
+            if line.strip():
+                output_stream.write(self.handle_line(line))
+                output_stream.flush()
+
+    def serve_unix_socket(self, socket_path: Union[pathlib.Path, str]) -> None:
+        """
+        Answer the clients connecting to a Unix socket, each one in its own thread, until interrupted.
+
+        Raises:
+          IOError: Raised if the socket can't be created, or another server listens on it.
+        """
+        import socketserver
+
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise IOError("Unix sockets aren't supported on this platform.")
+        if os.path.exists(socket_path):
+            if request_daemon(socket_path, {"command": "ping"}) is not None:
+                raise IOError(f"A server already listens on {socket_path}.")
+            # Left behind by a server that didn't stop cleanly.
+            os.unlink(socket_path)
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                server.serve_stream(self.rfile, self.wfile)
+
+        with socketserver.ThreadingUnixStreamServer(str(socket_path), Handler) as unix_server:
+            unix_server.daemon_threads = True
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.unlink(socket_path)
+
+
+def request_daemon(socket_path: Union[pathlib.Path, str], request: dict) -> Optional[dict]:
+    """
+    Send a request to the server listening on a Unix socket.
+
+    Returns:
+      The response, None if no server answers on socket_path.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(os.fspath(socket_path))
+            client.settimeout(None)
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with client.makefile("rb") as response:
+                line = response.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
+
+
+def forward_to_daemon(
+    socket_path: Union[pathlib.Path, str], paths: List[str], output: IO[str], errors: IO[str]
+) -> Optional[int]:
+    """
+    Check paths with the server listening on socket_path and print the
+    results as the command line does.
+
+    Returns:
+      The exit code of the command line, None if no server answers.
+    """
+    response = request_daemon(socket_path, {"paths": paths, "cwd": os.getcwd()})
+    if response is None or "error" in response:
+        return None
+    for result in response["results"]:
+        suggestions = ",".join('"%s"' % w for w in result["suggestions"])
+        output.write(f"{result['filename']}:{result['line']}: {result['word']} -> {suggestions}\n")
+    for error in response["errors"]:
+        errors.write(f"ERROR: {error}\n")
+    return 2 if response["results"] else 0
@@ -0,0 +1,197 @@
+import pathlib
+from collections import Counter
+from typing import List, Optional, TextIO
+
+from .lookup import MisspellingLookup
+from .results import Misspelling
+from .suggestions import SuggestionGenerator
+from .words import esc_file, esc_sed
+
+# When a StreamSink flushes its output: after each "file", only when its
+# "buffer" is full, or "auto": after each file when writing to a terminal,
+# when the buffer is full otherwise.
+FLUSH_POLICIES = ("auto", "file", "buffer")
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class ResultSink:
+    """
+    Receives the results of a scan, see MisspellingChecker.report().
+
+    A single scan feeds any number of sinks, so every output format is
+    produced without reading the files more than once.
+    """
+
+    lookup: MisspellingLookup
+
+    def start(self, lookup: MisspellingLookup) -> None:
+        """Called before the first file, lookup holding the suggestions of the misspelled words."""
+        self.lookup = lookup
+
+    def add_result(self, result: Misspelling) -> None:
+        """Called for each misspelling: filename, line number, misspelled word and column."""
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        """Called for each file that couldn't be checked."""
+
+    def end_file(self, filename: pathlib.Path) -> None:
+        """Called once all the results and errors of a file were given."""
+
+    def finish(self) -> None:
+        """Called after the last file."""
+
+
+class StreamSink(ResultSink):
+    """
+    Base of the sinks writing to a stream.
+
+    What they write is gathered and written buffer_size characters at a
+    time, so a scan piped into another program doesn't make a write call
+    per result, nor a flush per file unless asked for.
+    """
+
+    def __init__(
+        self,
+        output: TextIO,
+        errors: Optional[TextIO] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush: str = "auto",
+    ) -> None:
+        """
+        Args:
+          output: Where the results are written.
+          errors: Where the file access errors are written, None to leave them out.
+          buffer_size: Number of characters gathered before they are written.
+          flush: One of the FLUSH_POLICIES.
+
+        Raises:
+          ValueError: Raised if flush isn't one of the FLUSH_POLICIES.
+        """
+        if flush not in FLUSH_POLICIES:
+            raise ValueError(f'Unknown flush policy "{flush}", use one of {", ".join(FLUSH_POLICIES)}.')
+        if flush == "auto":
+            isatty = getattr(output, "isatty", None)
+            flush = "file" if isatty is not None and isatty() else "buffer"
+        self.output = output
+        self.errors = errors
+        self.buffer_size = buffer_size
+        self._flush_every_file = flush == "file"
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def write(self, text: str) -> None:
+        """Write text to the output, once the buffer is full."""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self.output.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        if self.errors is not None:
+            self.errors.write(f"ERROR: {error}\n")
+
+    def end_file(self, filename: pathlib.Path) -> None:
+        if self._flush_every_file:
+            self._write_buffer()
+            self.output.flush()
+
+    def finish(self) -> None:
+        self._write_buffer()
+        self.output.flush()
+
+
+class TextSink(StreamSink):
+    """Writes "filename:line: word -> suggestions" lines, as printed by the command line."""
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, line_ct, word, _ = result
+        self.write(f"{filename}:{line_ct}: {word} -> {self.lookup.quoted_suggestions(word)}\n")
+
+
+class SedScriptSink(ResultSink):
+    """Writes portable sed commands replacing each misspelling by its suggestion."""
+
+    def __init__(
+        self,
+        output: TextIO,
+        suggestion_generator: Optional[SuggestionGenerator] = None,
+        errors: Optional[TextIO] = None,
+    ) -> None:
+        """
+        Args:
+          output: Where the sed commands are written.
+          suggestion_generator: Asks which suggestion to use when there are several.
+          errors: Where the file access errors are written, None to leave them out.
+        """
+        self.output = output
+        self.suggestion_generator = suggestion_generator or SuggestionGenerator()
+        self.errors = errors
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, line_ct, word, _ = result
+        suggestions = self.lookup.suggestions(word)
+        if len(suggestions) == 1:
+            suggestion = suggestions[0]
+        else:
+            suggestion = self.suggestion_generator.get_suggestion(filename, line_ct, word, suggestions)
+        if suggestion != word:
+            self.output.write(
+                f'cp "{esc_file(filename)}" "{esc_file(filename)},"\n'
+                f'sed "{line_ct}s/{esc_sed(word)}/{esc_sed(suggestion)}/"'
+                f' "{esc_file(filename)}" > "{esc_file(filename)},"\n'
+                f'mv "{esc_file(filename)}," "{esc_file(filename)}"\n'
+            )
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        if self.errors is not None:
+            self.errors.write(f"ERROR: {error}\n")
+
+
+class CountSink(ResultSink):
+    """
+    Tallies the misspellings per word and per file, and writes the totals once
+    every file was checked.
+
+    Only the counters are kept, not the misspellings themselves, so any
+    number of them takes the same memory.
+    """
+
+    def __init__(self, output: TextIO, errors: Optional[TextIO] = None) -> None:
+        """
+        Args:
+          output: Where the totals are written.
+          errors: Where the file access errors are written, None to leave them out.
+        """
+        self.output = output
+        self.errors = errors
+        self.per_word: Counter = Counter()
+        self.per_file: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        """Number of misspellings found so far."""
+        return sum(self.per_file.values())
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, _, word, _ = result
+        self.per_word[word] += 1
+        self.per_file[filename] += 1
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        if self.errors is not None:
+            self.errors.write(f"ERROR: {error}\n")
+
+    def finish(self) -> None:
+        for title, counter in (("word", self.per_word), ("file", self.per_file)):
+            if counter:
+                self.output.write(f"Misspellings per {title}:\n")
+                for key, count in counter.most_common():
+                    self.output.write(f"{count:8} {key}\n")
+        self.output.write(f"Total: {self.total} misspellings in {len(self.per_file)} files\n")
+        self.output.flush()
@@ -0,0 +1,140 @@
+import os
+import re
+from typing import Optional, Union
+
+# Bytes read from the start of a file to tell what it holds.
+SNIFF_SIZE = 8 * 1024
+
+# What sniff() finds a file isn't: "binary", or "generated" by a tool,
+# minified files included, neither worth checking.
+BINARY = "binary"
+GENERATED = "generated"
+
+# Files never holding text, by extension, so they aren't even opened.
+BINARY_SUFFIXES = frozenset(
+    {
+        ".7z",
+        ".avif",
+        ".bin",
+        ".bmp",
+        ".bz2",
+        ".class",
+        ".db",
+        ".dll",
+        ".dylib",
+        ".eot",
+        ".exe",
+        ".gif",
+        ".gz",
+        ".ico",
+        ".jar",
+        ".jpeg",
+        ".jpg",
+        ".lz4",
+        ".mo",
+        ".mp3",
+        ".mp4",
+        ".npy",
+        ".otf",
+        ".parquet",
+        ".pdf",
+        ".pickle",
+        ".pkl",
+        ".png",
+        ".pyd",
+        ".pyo",
+        ".sqlite",
+        ".sqlite3",
+        ".tar",
+        ".tgz",
+        ".ttf",
+        ".wasm",
+        ".webp",
+        ".whl",
+        ".woff",
+        ".woff2",
+        ".xz",
+        ".zip",
+        ".zst",
+    }
+)
+GENERATED_SUFFIXES = (".min.js", ".min.css", ".min.mjs", ".js.map", ".css.map")
+# Signatures at the start of binary formats whatever the file is named.
+MAGIC_NUMBERS = (
+    b"\x7fELF",
+    b"\xca\xfe\xba\xbe",
+    b"\xcf\xfa\xed\xfe",
+    b"\xce\xfa\xed\xfe",
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+    b"\xff\xd8\xff",
+    b"%PDF-",
+    b"PK\x03\x04",
+    b"\x1f\x8b",
+    b"BZh",
+    b"\xfd7zXZ\x00",
+    b"7z\xbc\xaf\x27\x1c",
+    b"\x28\xb5\x2f\xfd",
+    b"SQLite format 3\x00",
+    b"\x00asm",
+    b"wOFF",
+    b"wOF2",
+    b"\x80\x04\x95",
+)
+
+# Control characters other than whitespace and the escapes of colored logs.
+_CONTROL_BYTES = bytes(set(range(32)) - set(b"\t\n\v\f\r\x1b")) + b"\x7f"
+# Share of control characters above which a file is binary.
+BINARY_CONTROL_RATIO = 0.1
+# Lines longer than this on average in a full block are minified code, in
+# files of these types only: prose and logs have long lines as well.
+MINIFIED_LINE_LENGTH = 1000
+MINIFIED_SUFFIXES = (".js", ".mjs", ".cjs", ".css", ".json", ".map", ".svg")
+# Markers of a generated file, looked for in a comment of its first lines only.
+GENERATED_MARKER_LINES = 5
+_GENERATED_MARKER_REGEX = re.compile(
+    rb"^\s*(?:#|//|/\*|\*|<!--|--|;|%).*?(?:@generated\b|\bDO NOT EDIT\b|\b[Aa]uto-?generated\b)"
+)
+
+
+def sniff_name(filename: Union[os.PathLike, str]) -> Optional[str]:
+    """Return BINARY or GENERATED from the extension of a file, None if it doesn't tell."""
+    name = os.path.basename(filename).lower()
+    if os.path.splitext(name)[1] in BINARY_SUFFIXES:
+        return BINARY
+    if name.endswith(GENERATED_SUFFIXES):
+        return GENERATED
+    return None
+
+
+def sniff(block: bytes, filename: Union[os.PathLike, str, None] = None) -> Optional[str]:
+    """
+    Tell whether a file is text from its first bytes.
+
+    Args:
+      block: The first SNIFF_SIZE bytes of the file, or all of it if shorter.
+      filename: Name of the file, minified lines are only looked for in code
+                and assets such as ".js" or ".css" files.
+    Returns:
+      BINARY for a NUL byte, a known magic number or too many control
+      characters, GENERATED for a marker such as "@generated" or "DO NOT EDIT"
+      in a comment of the first lines or minified lines, None for text.
+    """
+    if not block:
+        return None
+    if b"\x00" in block or block.startswith(MAGIC_NUMBERS):
+        return BINARY
+    if len(block) - len(block.translate(None, _CONTROL_BYTES)) > len(block) * BINARY_CONTROL_RATIO:
+        return BINARY
+    head = block.split(b"\n", GENERATED_MARKER_LINES)[:GENERATED_MARKER_LINES]
+    if any(_GENERATED_MARKER_REGEX.search(line) for line in head):
+        return GENERATED
+    if (
+        filename is not None
+        and os.path.basename(filename).lower().endswith(MINIFIED_SUFFIXES)
+        and len(block) >= SNIFF_SIZE
+        and block.count(b"\n") * MINIFIED_LINE_LENGTH < len(block)
+    ):
+        return GENERATED
+    return None
@@ -0,0 +1,174 @@
+import heapq
+import pathlib
+from collections import Counter
+from typing import Container, Dict, List, Optional, TextIO, Tuple, Union
+
+# Phases reported to CheckHooks.phase(), in the order they happen.
+PHASES = ("dictionary", "walk", "read", "match", "output")
+
+
+class FileStats:
+    """Counters of a checked file, see CheckHooks.file_checked()."""
+
+    __slots__ = (
+        "bytes",
+        "lines",
+        "tokens",
+        "lookups",
+        "hits",
+        "seconds",
+        "match_seconds",
+        "cached",
+        "skipped",
+        "truncated",
+    )
+
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.lines = 0
+        self.tokens = 0
+        # Dictionary probes made by the matching engine.
+        self.lookups = 0
+        self.hits = 0
+        self.seconds = 0.0
+        self.match_seconds = 0.0
+        self.cached = False
+        # Why the rest of the file wasn't checked, such as an invalid encoding.
+        self.skipped: Optional[str] = None
+        # Lines of which only the start was checked, see MisspellingChecker.set_limits().
+        self.truncated = 0
+
+
+class CheckHooks:
+    """
+    Receives what a MisspellingChecker is doing, see MisspellingChecker.set_hooks().
+
+    Every method does nothing, override the events you need. The checker
+    doesn't measure anything unless hooks are set.
+    """
+
+    def phase(self, name: str, seconds: float) -> None:
+        """Called with time spent in one of the PHASES, usually many times per phase."""
+
+    def file_checked(self, filename: Union[pathlib.Path, str], stats: FileStats) -> None:
+        """Called once a file was checked, from the cache or not."""
+
+    def file_skipped(self, filename: Union[pathlib.Path, str], reason: str) -> None:
+        """
+        Called for a directory, or after file_checked() for a binary or generated
+        file, a file that isn't valid UTF-8 or that went over a limit.
+        """
+
+    def file_failed(self, filename: Union[pathlib.Path, str], error: Exception) -> None:
+        """Called for a file that couldn't be read."""
+
+
+class ProbeCounter:
+    """Counts the dictionary probes of a matching engine, see TokenizerMatcher.with_lookup()."""
+
+    __slots__ = ("_lookup", "probes")
+
+    def __init__(self, lookup: Container[str]) -> None:
+        self._lookup = lookup
+        self.probes = 0
+
+    def __contains__(self, word: object) -> bool:
+        self.probes += 1
+        return word in self._lookup
+
+
+class HookRecorder(CheckHooks):
+    """Records the events of a worker process, so they can be replayed into the hooks of the parent process."""
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, tuple]] = []
+
+    def phase(self, *args) -> None:
+        self.events.append(("phase", args))
+
+    def file_checked(self, *args) -> None:
+        self.events.append(("file_checked", args))
+
+    def file_skipped(self, *args) -> None:
+        self.events.append(("file_skipped", args))
+
+    def file_failed(self, *args) -> None:
+        self.events.append(("file_failed", args))
+
+    def pop_events(self) -> List[Tuple[str, tuple]]:
+        events, self.events = self.events, []
+        return events
+
+
+class ScanStats(CheckHooks):
+    """Sums up the events of a check into the report printed by --stats."""
+
+    def __init__(self, slowest: int = 10) -> None:
+        """
+        Args:
+          slowest: Number of slowest files to keep.
+        """
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.totals = FileStats()
+        self.files = 0
+        self.cached_files = 0
+        self.skipped: List[Tuple[Union[pathlib.Path, str], str]] = []
+        self.failed: List[Tuple[Union[pathlib.Path, str], Exception]] = []
+        self._slowest_count = slowest
+        self._slowest: List[Tuple[float, str]] = []
+
+    def phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def file_checked(self, filename: Union[pathlib.Path, str], stats: FileStats) -> None:
+        self.files += 1
+        self.cached_files += stats.cached
+        for counter in ("bytes", "lines", "tokens", "lookups", "hits", "seconds", "match_seconds", "truncated"):
+            setattr(self.totals, counter, getattr(self.totals, counter) + getattr(stats, counter))
+        if self._slowest_count > 0:
+            heapq.heappush(self._slowest, (stats.seconds, str(filename)))
+            if len(self._slowest) > self._slowest_count:
+                heapq.heappop(self._slowest)
+
+    def file_skipped(self, filename: Union[pathlib.Path, str], reason: str) -> None:
+        self.skipped.append((filename, reason))
+
+    def file_failed(self, filename: Union[pathlib.Path, str], error: Exception) -> None:
+        self.failed.append((filename, error))
+
+    def _skipped_reasons(self) -> str:
+        reasons = Counter(reason for _, reason in self.skipped)
+        if not reasons:
+            return ""
+        return " (" + ", ".join(f"{reason}: {count}" for reason, count in reasons.most_common()) + ")"
+
+    def slowest_files(self) -> List[Tuple[float, str]]:
+        """Return the seconds and name of the slowest files, slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def write_report(self, output: TextIO) -> None:
+        """Write the time spent in each phase, the counters and the slowest files."""
+        total = sum(self.phases.values())
+        output.write("Phases:\n")
+        for name, seconds in self.phases.items():
+            share = seconds / total if total else 0.0
+            output.write(f"  {name:<12} {seconds * 1000:10.1f} ms {share:6.1%}\n")
+        output.write(f"  {'total':<12} {total * 1000:10.1f} ms\n")
+        totals = self.totals
+        output.write(
+            "Counters:\n"
+            f"  files        {self.files} ({self.cached_files} from the cache)\n"
+            f"  bytes        {totals.bytes}\n"
+            f"  lines        {totals.lines}\n"
+            f"  tokens       {totals.tokens}\n"
+            f"  lookups      {totals.lookups}\n"
+            f"  hits         {totals.hits}\n"
+            f"  skipped      {len(self.skipped)}{self._skipped_reasons()}\n"
+            f"  truncated    {totals.truncated} lines\n"
+            f"  errors       {len(self.failed)}\n"
+        )
+        slowest = self.slowest_files()
+        if slowest:
+            output.write("Slowest files:\n")
+            for seconds, filename in slowest:
+                output.write(f"  {seconds * 1000:10.1f} ms  {filename}\n")
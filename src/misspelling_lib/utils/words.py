@@ -1,10 +1,28 @@
+import os
 import re
 import string
+import threading
+from array import array
+from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Pattern, Tuple, Union
 
 _NORM_REGEX = re.compile(r"(?<=[a-z])?(?=[A-Z])")
 _WORD_REGEX = re.compile(r"[\s_0-9\W]+", flags=re.UNICODE)
+# A word as split_words() sees it: a run of the characters _WORD_REGEX doesn't
+# split on, non-ASCII digits included, where an ASCII upper case letter always
+# starts a new word.
+_WORD_SHAPE_REGEX = re.compile(r"[A-Z]?[^\W_0-9A-Z]+|[A-Z]")
+# The same on an ASCII line, where the simpler character classes are faster.
+_ASCII_WORD_SHAPE_REGEX = re.compile(r"[A-Z]?[a-z]+|[A-Z]")
+# Line ends as counted when reading a file in text mode.
+_NEWLINE_BYTES_REGEX = re.compile(rb"\r\n|\r|\n")
+
+# Number of files whose line offsets are kept by get_a_line().
+LINE_OFFSETS_CACHE_SIZE = 32
+# Per file: the size and mtime it had, and the offsets of its lines.
+_line_offsets_cache: "OrderedDict[str, Tuple[Tuple[int, int], array]]" = OrderedDict()
+_line_offsets_lock = threading.Lock()
 
 
 def normalize(word: str) -> str:
@@ -20,6 +38,26 @@ def split_words(line: str) -> List[str]:
     return [normalize(w) for w in _WORD_REGEX.split(line)]
 
 
+def _word_shape_regex(line: str) -> Pattern[str]:
+    return _ASCII_WORD_SHAPE_REGEX if line.isascii() else _WORD_SHAPE_REGEX
+
+
+def tokenize(line: str) -> List[str]:
+    """
+    Return the words of a line: the words of split_words(), without its empty strings.
+
+    Camel case is split and the words are extracted in a single pass over
+    the line, instead of a copy of the line per step.
+    """
+    return _word_shape_regex(line).findall(line)
+
+
+def tokenize_with_columns(line: str) -> Iterator[Tuple[int, str]]:
+    """Yield the column, counted from 1, and the word of each word of a line, as found by tokenize()."""
+    for match in _word_shape_regex(line).finditer(line):
+        yield match.start() + 1, match.group()
+
+
 def same_case(source: str, destination: str) -> str:
     """Return destination with same case as source."""
     if source and source[:1].isupper():
@@ -27,11 +65,50 @@ def same_case(source: str, destination: str) -> str:
     return destination
 
 
-def get_a_line(filename: str, lineno: int) -> str:
-    """Read a specific line from a file."""
-    # Perhaps caching this would be nice, but assuming not an insane
-    # number of misspellings.
-    return open(filename, "r", encoding="utf-8").readlines()[lineno - 1].rstrip()
+def _line_offsets(filename: str) -> array:
+    """Return the offset of each line of a file followed by its size, from the cache while the file is unchanged."""
+    stat = os.stat(filename)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    with _line_offsets_lock:
+        cached = _line_offsets_cache.get(filename)
+        if cached is not None and cached[0] == stamp:
+            _line_offsets_cache.move_to_end(filename)
+            return cached[1]
+
+    with open(filename, "rb") as f:
+        data = f.read()
+    offsets = array("q", [0])
+    offsets.extend(match.end() for match in _NEWLINE_BYTES_REGEX.finditer(data))
+    if offsets[-1] != len(data):
+        offsets.append(len(data))
+    with _line_offsets_lock:
+        _line_offsets_cache[filename] = (stamp, offsets)
+        _line_offsets_cache.move_to_end(filename)
+        while len(_line_offsets_cache) > LINE_OFFSETS_CACHE_SIZE:
+            _line_offsets_cache.popitem(last=False)
+    return offsets
+
+
+def get_a_line(filename: Union[Path, str], lineno: int) -> str:
+    """
+    Read a specific line from a file.
+
+    The file is read in full once to find where its lines start, then only
+    the line asked for is read. The offsets of the last files read are
+    kept, so prompting for every misspelling of a big file doesn't read it
+    again each time.
+
+    Raises:
+      IndexError: Raised if the file has fewer lines.
+    """
+    filename = os.fspath(filename)
+    offsets = _line_offsets(filename)
+    if not 0 < lineno < len(offsets):
+        raise IndexError(f"{filename} has no line {lineno}")
+    with open(filename, "rb") as f:
+        f.seek(offsets[lineno - 1])
+        line = f.read(offsets[lineno] - offsets[lineno - 1])
+    return line.decode("utf-8").rstrip()
 
 
 def esc_sed(raw_text: str) -> str:
@@ -0,0 +1,161 @@
+import json
+import pathlib
+from typing import Dict, List, Optional, TextIO, Union
+from urllib.parse import quote
+
+from .lookup import MisspellingLookup
+from .results import Misspelling
+from .sinks import DEFAULT_BUFFER_SIZE, StreamSink, TextSink
+from .version import __version__
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "misspelling"
+
+# Encodes a str or a list as JSON, built once instead of on every json.dumps() call.
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class _JsonSink(StreamSink):
+    """Keeps the JSON of the file name and of the suggestions of each word, encoded once however many results."""
+
+    def __init__(
+        self,
+        output: TextIO,
+        errors: Optional[TextIO] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush: str = "auto",
+    ) -> None:
+        super().__init__(output, errors, buffer_size, flush)
+        self._encoded_suggestions: Dict[str, str] = {}
+        self._encoded_filename: Optional[str] = None
+
+    def start(self, lookup: MisspellingLookup) -> None:
+        super().start(lookup)
+        self._encoded_suggestions = {}
+
+    def _suggestions(self, word: str) -> str:
+        encoded = self._encoded_suggestions.get(word)
+        if encoded is None:
+            encoded = self._encoded_suggestions[word] = _encode(list(self.lookup.suggestions(word)))
+        return encoded
+
+    def _filename(self, filename: Union[pathlib.Path, str]) -> str:
+        if self._encoded_filename is None:
+            self._encoded_filename = _encode(self._uri(filename))
+        return self._encoded_filename
+
+    @staticmethod
+    def _uri(filename: Union[pathlib.Path, str]) -> str:
+        return str(filename)
+
+    def end_file(self, filename: pathlib.Path) -> None:
+        self._encoded_filename = None
+        super().end_file(filename)
+
+
+class JsonLinesSink(_JsonSink):
+    """
+    Writes a JSON object per line: {"filename", "line", "column", "word", "suggestions"}
+    for each misspelling, and {"filename", "error"} for each file that couldn't
+    be checked.
+    """
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, line_ct, word, column = result
+        self.write(
+            f'{{"filename":{self._filename(filename)},"line":{line_ct},"column":{column},'
+            f'"word":{_encode(word)},"suggestions":{self._suggestions(word)}}}\n'
+        )
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        super().add_error(filename, error)
+        self.write(f'{{"filename":{_encode(str(filename))},"error":{_encode(str(error))}}}\n')
+
+
+class SarifSink(_JsonSink):
+    """
+    Writes a SARIF 2.1.0 log, as read by code scanning tools.
+
+    The results are streamed as they come, the files that couldn't be
+    checked are listed as notifications of the invocation at the end.
+    """
+
+    def __init__(
+        self,
+        output: TextIO,
+        errors: Optional[TextIO] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush: str = "auto",
+    ) -> None:
+        super().__init__(output, errors, buffer_size, flush)
+        self._separator = ""
+        self._notifications: List[str] = []
+
+    @staticmethod
+    def _uri(filename: Union[pathlib.Path, str]) -> str:
+        path = pathlib.Path(filename)
+        if path.is_absolute():
+            return path.as_uri()
+        return quote(path.as_posix())
+
+    def start(self, lookup: MisspellingLookup) -> None:
+        super().start(lookup)
+        self._separator = ""
+        self._notifications = []
+        driver = {
+            "name": "misspellings",
+            "version": __version__,
+            "informationUri": "https://github.com/mazulo/misspelling",
+            "rules": [{"id": SARIF_RULE_ID, "shortDescription": {"text": "Commonly misspelled word"}}],
+        }
+        self.write(
+            f'{{"$schema":"{SARIF_SCHEMA}","version":"2.1.0","runs":[{{"tool":{{"driver":{_encode(driver)}}},'
+            f'"columnKind":"unicodeCodePoints","results":['
+        )
+
+    def add_result(self, result: Misspelling) -> None:
+        filename, line_ct, word, column = result
+        message = _encode(f'"{word}" is misspelled, suggestions: {self.lookup.quoted_suggestions(word)}')
+        self.write(
+            f'{self._separator}\n{{"ruleId":"{SARIF_RULE_ID}","level":"warning","message":{{"text":{message}}},'
+            f'"locations":[{{"physicalLocation":{{"artifactLocation":{{"uri":{self._filename(filename)}}},'
+            f'"region":{{"startLine":{line_ct},"startColumn":{column},"endColumn":{column + len(word)}}}}}}}]}}'
+        )
+        self._separator = ","
+
+    def add_error(self, filename: pathlib.Path, error: Exception) -> None:
+        super().add_error(filename, error)
+        self._notifications.append(_encode({"level": "error", "message": {"text": str(error)}}))
+
+    def finish(self) -> None:
+        self.write(
+            '\n],"invocations":[{"executionSuccessful":true,"toolExecutionNotifications":['
+            + ",".join(self._notifications)
+            + "]}]}]}\n"
+        )
+        super().finish()
+
+
+OUTPUT_FORMATS = {
+    "text": TextSink,
+    "jsonl": JsonLinesSink,
+    "sarif": SarifSink,
+}
+
+
+def create_sink(
+    output_format: str,
+    output: TextIO,
+    errors: Optional[TextIO] = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    flush: str = "auto",
+) -> StreamSink:
+    """
+    Return the sink writing the results in one of the OUTPUT_FORMATS.
+
+    Raises:
+      ValueError: Raised if output_format or flush isn't known.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f'Unknown output format "{output_format}", use one of {", ".join(OUTPUT_FORMATS)}.')
+    return OUTPUT_FORMATS[output_format](output, errors, buffer_size=buffer_size, flush=flush)
@@ -1,10 +1,59 @@
+import array
+import asyncio
+import io
+import json
 import os
+import pickle
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 
-from src.misspelling_lib import MisspellingDetector, MisspellingFileDetector, MisspellingJSONDetector
-from src.misspelling_lib.utils import normalize, same_case, split_words
+from src.misspelling_lib import (
+    MisspellingDetector,
+    MisspellingFileDetector,
+    MisspellingJSONDetector,
+)
+from src.misspelling_lib.utils import (
+    CountSink,
+    FileLimitExceeded,
+    FixSink,
+    IgnoreFile,
+    JsonLinesSink,
+    Misspelling,
+    MisspellingIndex,
+    MisspellingLookup,
+    MisspellingServer,
+    SarifSink,
+    ScanStats,
+    SedScriptSink,
+    StreamSink,
+    TextSink,
+    TokenizerMatcher,
+    collect_changes,
+    compile_index,
+    create_sink,
+    expand_directories,
+    get_a_line,
+    load_index,
+    normalize,
+    same_case,
+    sniff,
+    sniff_name,
+    split_words,
+    tokenize,
+    tokenize_with_columns,
+    word_columns,
+)
+from src.misspelling_lib.utils.extractors import (
+    c_like_comments_and_strings,
+    python_comments_and_strings,
+    shell_like_comments_and_strings,
+)
 
 BASE_PATH = Path(__file__).parents[0]
 
@@ -43,6 +92,879 @@ class TestMisspellingDetector:
         assert len(errors) == 0
         assert len(results) == 7
 
+    def test_check_many_keeps_order_with_jobs(self):
+        ms = MisspellingDetector()
+        filenames = [
+            BASE_PATH / "test_assets/various_spellings.c",
+            BASE_PATH / "test_assets/missing_source.c",
+            BASE_PATH / "test_assets/nine_misspellings.c",
+        ]
+        sequential = [(f, e, list(r)) for f, e, r in ms.check_many(filenames)]
+        parallel = list(ms.check_many(filenames, jobs=2))
+        assert [f for f, _, _ in parallel] == filenames
+        assert [r for _, _, r in parallel] == [r for _, _, r in sequential]
+        assert [len(e) for _, e, _ in sequential] == [0, 1, 0]
+        assert [len(e) for _, e, _ in parallel] == [0, 1, 0]
+
+    def test_iter_check_is_lazy(self):
+        ms = MisspellingDetector()
+        results = ms.iter_check(BASE_PATH / "test_assets/various_spellings.c")
+        assert next(results)[1:] == (1, "Yuo", 1)
+        assert len(list(results)) == 6
+
+    def test_line_numbers_after_ignored_line(self):
+        ms = MisspellingDetector()
+        _, results = ms.check(BASE_PATH / "test_assets/nine_misspellings_with_ignore.c")
+        assert [r[1] for r in results] == [2, 3, 4, 5, 6, 7, 8, 9]
+
+
+class TestTextApi:
+    def test_check_text(self):
+        ms = MisspellingDetector()
+        assert ms.check_text("The cat\nsaw teh zeebraYuo, yuo! # ignore-misspelling\r\n  teh\rgardai") == [
+            (3, 3, "teh"),
+            (4, 1, "gardai"),
+        ]
+        assert ms.check_text("Teh zeebraYuo") == [(1, 1, "Teh"), (1, 5, "zeebra"), (1, 11, "Yuo")]
+        assert ms.check_text("") == []
+
+    def test_check_text_matches_check(self):
+        ms = MisspellingDetector()
+        filename = BASE_PATH / "test_assets/various_spellings.c"
+        text = filename.read_text(encoding="utf-8")
+        assert [(filename, line_ct, word, column) for line_ct, column, word in ms.check_text(text)] == ms.check(
+            filename
+        )[1]
+
+    def test_check_many_texts(self):
+        ms = MisspellingDetector()
+        texts = ["fix teh bug", "nothing wrong", "fix teh bug", "yuo\nteh"]
+        assert list(ms.check_many_texts(texts)) == [
+            (0, 1, 5, "teh"),
+            (2, 1, 5, "teh"),
+            (3, 1, 1, "yuo"),
+            (3, 2, 1, "teh"),
+        ]
+        assert list(ms.check_many_texts(iter(texts))) == list(ms.check_many_texts(texts))
+
+
+class TestResultSinks:
+    def test_every_sink_is_fed_by_a_single_scan(self, monkeypatch):
+        ms = MisspellingDetector()
+        scanned = []
+        scan_file = ms._scan_file
+        monkeypatch.setattr(
+            ms, "_scan_file", lambda filename, *args: scanned.append(filename) or scan_file(filename, *args)
+        )
+        # Take the default suggestion whenever the sed script asks for one.
+        monkeypatch.setattr("sys.stdin", io.StringIO("\n" * 10))
+        filenames = [BASE_PATH / "test_assets/various_spellings.c", BASE_PATH / "test_assets/missing_source.c"]
+        printed, exported, sed_script, errors = io.StringIO(), io.StringIO(), io.StringIO(), io.StringIO()
+        sinks = [TextSink(printed, errors=errors), TextSink(exported), SedScriptSink(sed_script)]
+
+        assert ms.report(filenames, sinks)
+        assert scanned == filenames
+        assert printed.getvalue() == exported.getvalue()
+        assert len(printed.getvalue().splitlines()) == 7
+        assert sed_script.getvalue().count("\nsed ") == 7
+        assert errors.getvalue().startswith("ERROR: ")
+
+    def test_print_result(self):
+        output = io.StringIO()
+        assert MisspellingDetector().print_result([BASE_PATH / "test_assets/nine_misspellings.c"], output)
+        assert output.getvalue().startswith(f"{BASE_PATH / 'test_assets/nine_misspellings.c'}:")
+        assert len(output.getvalue().splitlines()) == 9
+
+    def test_count_sink(self):
+        output = io.StringIO()
+        sink = CountSink(output)
+        filenames = [BASE_PATH / "test_assets/nine_misspellings.c", BASE_PATH / "test_assets/various_spellings.c"]
+        assert MisspellingDetector().report(filenames, [sink])
+        assert sink.total == 16
+        assert sink.per_file == {filenames[0]: 9, filenames[1]: 7}
+        assert output.getvalue().endswith("Total: 16 misspellings in 2 files\n")
+
+    @pytest.mark.parametrize("flush, writes", [("file", 2), ("buffer", 1)])
+    def test_stream_sink_flush_policies(self, flush, writes):
+        output = io.StringIO()
+        written = []
+        output.write = written.append
+        sink = TextSink(output, buffer_size=1 << 20, flush=flush)
+        filenames = [BASE_PATH / "test_assets/nine_misspellings.c", BASE_PATH / "test_assets/various_spellings.c"]
+        assert MisspellingDetector().report(filenames, [sink])
+        assert len(written) == writes
+        assert len("".join(written).splitlines()) == 16
+
+    def test_stream_sink_buffer_size(self):
+        output = io.StringIO()
+        written = []
+        output.write = written.append
+        sink = TextSink(output, buffer_size=1, flush="buffer")
+        assert MisspellingDetector().report([BASE_PATH / "test_assets/nine_misspellings.c"], [sink])
+        assert len(written) == 9
+
+    def test_stream_sink_unknown_flush_policy(self):
+        with pytest.raises(ValueError):
+            StreamSink(io.StringIO(), flush="never")
+
+    def test_json_lines_sink(self):
+        output, errors = io.StringIO(), io.StringIO()
+        filenames = [BASE_PATH / "test_assets/various_spellings.c", BASE_PATH / "test_assets/missing_source.c"]
+        assert MisspellingDetector().report(filenames, [JsonLinesSink(output, errors)])
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert len(records) == 8
+        assert records[0] == {
+            "filename": str(filenames[0]),
+            "line": 1,
+            "column": 1,
+            "word": "Yuo",
+            "suggestions": ["You"],
+        }
+        assert records[-1]["filename"] == str(filenames[1])
+        assert "error" in records[-1]
+        assert errors.getvalue().startswith("ERROR: ")
+
+    def test_sarif_sink(self):
+        output = io.StringIO()
+        filenames = [BASE_PATH / "test_assets/various_spellings.c", BASE_PATH / "test_assets/missing_source.c"]
+        assert MisspellingDetector().report(filenames, [SarifSink(output)])
+        log = json.loads(output.getvalue())
+        assert log["version"] == "2.1.0"
+        (run,) = log["runs"]
+        assert len(run["results"]) == 7
+        location = run["results"][0]["locations"][0]["physicalLocation"]
+        assert location["artifactLocation"]["uri"] == filenames[0].as_uri()
+        assert location["region"] == {"startLine": 1, "startColumn": 1, "endColumn": 4}
+        assert len(run["invocations"][0]["toolExecutionNotifications"]) == 1
+
+    def test_sarif_sink_without_results(self):
+        output = io.StringIO()
+        assert not MisspellingDetector().report([], [SarifSink(output)])
+        assert json.loads(output.getvalue())["runs"][0]["results"] == []
+
+    def test_create_sink(self):
+        assert isinstance(create_sink("jsonl", io.StringIO()), JsonLinesSink)
+        assert isinstance(create_sink("text", io.StringIO()), TextSink)
+        with pytest.raises(ValueError):
+            create_sink("xml", io.StringIO())
+
+
+class TestFixSink:
+    @pytest.mark.parametrize("threads", [1, 3])
+    def test_fix_files_in_place(self, tmp_path, threads):
+        sources = []
+        for number in range(4):
+            source = tmp_path / f"source{number}.c"
+            source.write_bytes(b"Teh cat and teh dog, zeebraTeh\r\nnothing\nteh")
+            sources.append(source)
+        sink = FixSink(threads=threads)
+        assert MisspellingDetector().report(sources, [sink])
+        assert sink.fixed == 20
+        for source in sources:
+            assert source.read_bytes() == b"The cat and the dog, zebraThe\r\nnothing\nthe"
+        assert MisspellingDetector().check(sources[0]) == ([], [])
+
+    def test_ambiguous_misspellings_are_left(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("zeebra achive\n", encoding="utf-8")
+        ms = MisspellingDetector()
+        sink = FixSink()
+        assert ms.report([source], [sink])
+        assert (sink.fixed, sink.unfixed) == (1, 1)
+        assert source.read_text(encoding="utf-8") == "zebra achive\n"
+
+    def test_dry_run(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("one\nteh\n", encoding="utf-8")
+        diff = io.StringIO()
+        assert MisspellingDetector().report([source], [FixSink(diff)])
+        assert source.read_text(encoding="utf-8") == "one\nteh\n"
+        assert diff.getvalue().splitlines()[-2:] == ["-teh", "+the"]
+
+
+class TestCommentsAndStrings:
+    def test_python(self):
+        text = 'def teh():\n    """Wiht\n    teh docstring."""\n    return teh  # zeebra\n'
+        assert python_comments_and_strings(text) == ["", '    """Wiht', '    teh docstring."""', " " * 16 + "# zeebra"]
+
+    def test_invalid_python_is_kept(self):
+        assert python_comments_and_strings("print teh\n    (\n") == ["print teh", "    ("]
+
+    def test_c_like(self):
+        text = 'int teh; // wiht\n/* a\n teh */ s = "it\\"s" + \'c\';\n'
+        assert c_like_comments_and_strings(text) == ["         // wiht", "/* a", ' teh */     "it\\"s"   \'c\'']
+
+    def test_shell_like(self):
+        text = 'teh=1 # wiht\necho "$# zeebra" a#b\n'
+        # The rest is blanked out, so the columns are the same as in the file.
+        assert shell_like_comments_and_strings(text) == ["      # wiht", '     "$# zeebra"']
+
+    def test_only_comments_and_strings_are_checked(self, tmp_path):
+        source = tmp_path / "source.py"
+        source.write_text("teh = 1  # zeebra\nprint('Teh')\n", encoding="utf-8")
+        notes = tmp_path / "notes.md"
+        notes.write_text("teh\n", encoding="utf-8")
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        assert len(ms.check(source)[1]) == 3
+        ms.restrict_to_comments_and_strings()
+        assert ms.check(source)[1] == [(source, 1, "zeebra", 12), (source, 2, "Teh", 8)]
+        assert ms.check(notes)[1] == [(notes, 1, "teh", 1)]
+        ms.restrict_to_comments_and_strings(False)
+        assert len(ms.check(source)[1]) == 3
+
+
+class TestSniffing:
+    @pytest.mark.parametrize(
+        "block, filename, kind",
+        [
+            (b"teh zeebra\n", "notes.txt", None),
+            (b"", "notes.txt", None),
+            (b"\x1b[31mteh\x1b[0m\n", "build.log", None),
+            ("caf\u00e9 teh\n".encode("utf-8"), "notes.txt", None),
+            (b"teh\x00zeebra", "data", "binary"),
+            (b"\x89PNG\r\n\x1a\nteh", "image", "binary"),
+            (b"SQLite format 3\x00", "data", "binary"),
+            (b"teh\x01\x02\x03\x04", "data", "binary"),
+            (b"# @generated by a tool\nteh\n", "tool.py", "generated"),
+            (b"// Code generated by protoc. DO NOT EDIT.\nteh\n", "api.pb.go", "generated"),
+            (b"<!-- Auto-generated from the schema -->\nteh\n", "api.md", "generated"),
+            (b"var teh=1;" * 1000, "bundle.js", "generated"),
+            (b"teh\n" * 10 + b"# DO NOT EDIT\n", "tool.py", None),
+            # Prose mentioning the markers, and prose or logs with long lines, are text.
+            (b"The tables are auto-generated, DO NOT EDIT them.\n", "README.md", None),
+            (b"teh zeebra " * 1000, "notes.txt", None),
+            (b"teh zeebra " * 1000, None, None),
+        ],
+    )
+    def test_sniff(self, block, filename, kind):
+        assert sniff(block, filename) == kind
+
+    def test_sniff_name(self):
+        assert sniff_name("logo.PNG") == "binary"
+        assert sniff_name(Path("static/app.min.js")) == "generated"
+        assert sniff_name("app.js") is None
+
+    def test_binary_and_generated_files_are_skipped(self, tmp_path):
+        ms = MisspellingDetector()
+        stats = ScanStats()
+        ms.set_hooks(stats)
+        data = tmp_path / "data"
+        data.write_bytes(b"teh\x00" * 1000)
+        image = tmp_path / "image.png"
+        image.write_text("teh\n", encoding="utf-8")
+        generated = tmp_path / "generated.py"
+        generated.write_text("# Autogenerated, DO NOT EDIT.\nteh = 1\n", encoding="utf-8")
+        for filename in (data, image, generated):
+            assert ms.check(filename) == ([], [])
+        assert stats.skipped == [(data, "binary"), (image, "binary"), (generated, "generated")]
+        report = io.StringIO()
+        stats.write_report(report)
+        assert "skipped      3 (binary: 2, generated: 1)\n" in report.getvalue()
+
+        ms.enable_scan_cache(tmp_path / "cache")
+        ms.check_generated_files()
+        assert ms.check(generated)[1] == [(generated, 2, "teh", 1)]
+        assert ms.check(data) == ([], [])
+        ms.check_generated_files(False)
+        assert ms.check(generated) == ([], [])
+
+
+class TestLimits:
+    def test_max_file_size(self, tmp_path):
+        ms = MisspellingDetector()
+        stats = ScanStats()
+        ms.set_hooks(stats)
+        ms.set_limits(max_file_size=8)
+        small, large = tmp_path / "small.txt", tmp_path / "large.txt"
+        small.write_text("teh\n", encoding="utf-8")
+        large.write_text("teh zeebra\n", encoding="utf-8")
+        assert ms.check(small)[1] == [(small, 1, "teh", 1)]
+        (error,), results = ms.check(large)
+        assert results == []
+        assert isinstance(error, FileLimitExceeded)
+        assert str(error) == f"{large}: too large, skipped as 11 bytes is over the 8 bytes limit"
+        assert stats.skipped == [(large, "too large")]
+        ms.set_limits()
+        assert len(ms.check(large)[1]) == 2
+
+    def test_max_file_size_with_cache(self, tmp_path):
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        source = tmp_path / "source.txt"
+        source.write_text("teh zeebra\n", encoding="utf-8")
+        assert len(ms.check(source)[1]) == 2
+        ms.set_limits(max_file_size=8)
+        (error,), results = ms.check(source)
+        assert results == []
+        assert error.reason == "too large"
+
+    @pytest.mark.parametrize("mapped", [False, True])
+    def test_max_line_length(self, tmp_path, monkeypatch, mapped):
+        if mapped:
+            from src.misspelling_lib import misspelling_checker
+
+            monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1)
+        ms = MisspellingDetector()
+        ms.set_limits(max_line_length=10)
+        source = tmp_path / "source.txt"
+        source.write_text("teh yuo zeebra\nteh\n", encoding="utf-8")
+        # "zeebra" is cut in two by the limit, so left out.
+        assert ms.check(source)[1] == [(source, 1, "teh", 1), (source, 1, "yuo", 5), (source, 2, "teh", 1)]
+        ignored = tmp_path / "ignored.txt"
+        ignored.write_text("teh " * 10 + "# ignore-misspelling\n", encoding="utf-8")
+        assert ms.check(ignored) == ([], [])
+
+    @pytest.mark.parametrize("mapped", [False, True])
+    def test_timeout(self, tmp_path, monkeypatch, mapped):
+        from src.misspelling_lib import misspelling_checker
+
+        if mapped:
+            monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1)
+            monkeypatch.setattr(misspelling_checker, "MMAP_BLOCK_SIZE", 64)
+        monkeypatch.setattr(misspelling_checker, "TIMEOUT_CHECK_LINES", 1)
+        ms = MisspellingDetector()
+        ms.set_limits(timeout=0.0)
+        source = tmp_path / "source.txt"
+        source.write_text("teh\n" * 100, encoding="utf-8")
+        (error,), results = ms.check(source)
+        assert error.reason == "timed out"
+        assert len(results) < 100
+
+    def test_limit_with_cache_keeps_the_results_found(self, tmp_path, monkeypatch):
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        source = tmp_path / "source.txt"
+        source.write_text("teh\nyuo\n", encoding="utf-8")
+        scan_file = ms._scan_file
+
+        def timed_out(filename, stats=None):
+            yield next(scan_file(filename, stats))
+            raise FileLimitExceeded(filename, "timed out", "stopped at line 2")
+
+        monkeypatch.setattr(ms, "_scan_file", timed_out)
+        (error,), results = ms.check(source)
+        assert error.reason == "timed out"
+        assert results == [(source, 1, "teh", 1)]
+        # The partial results weren't stored.
+        monkeypatch.setattr(ms, "_scan_file", scan_file)
+        assert ms.check(source) == ([], [(source, 1, "teh", 1), (source, 2, "yuo", 1)])
+
+    def test_fail_fast(self):
+        output = io.StringIO()
+        filenames = [BASE_PATH / "test_assets/nine_misspellings.c", BASE_PATH / "test_assets/various_spellings.c"]
+        ms = MisspellingDetector()
+        scanned = []
+        scan_file = ms._scan_file
+        ms._scan_file = lambda filename, *args: scanned.append(filename) or scan_file(filename, *args)
+        assert ms.report(filenames, [TextSink(output)], fail_fast=True)
+        assert len(output.getvalue().splitlines()) == 1
+        assert scanned == filenames[:1]
+
+    def test_fail_fast_with_jobs(self):
+        output = io.StringIO()
+        filenames = [BASE_PATH / "test_assets/nine_misspellings.c", BASE_PATH / "test_assets/various_spellings.c"]
+        assert MisspellingDetector().report(filenames, [TextSink(output)], jobs=2, fail_fast=True)
+        assert len(output.getvalue().splitlines()) == 1
+
+
+class TestMisspellingRecords:
+    def test_records_are_compact(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("teh\nAnd teh again\n", encoding="utf-8")
+        first, second = MisspellingDetector().check(source)[1]
+        assert isinstance(first, Misspelling)
+        assert not hasattr(first, "__dict__")
+        assert (second.filename, second.line, second.word) == (source, 2, "teh")
+        # The column comes last, so the fields indexed before it are where they were.
+        assert second[:3] == (source, 2, "teh")
+        assert second.column == 5
+        # The same word found twice is stored once.
+        assert first.word is second.word
+
+
+class TestCheckHooks:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_stats(self, jobs):
+        ms = MisspellingDetector()
+        stats = ScanStats(slowest=2)
+        ms.set_hooks(stats)
+        filenames = [
+            BASE_PATH / "test_assets/nine_misspellings.c",
+            BASE_PATH / "test_assets/various_spellings.c",
+            BASE_PATH / "test_assets/missing_source.c",
+            BASE_PATH / "test_assets",
+        ]
+        assert ms.report(filenames, [TextSink(io.StringIO())], jobs=jobs)
+
+        assert stats.files == 2
+        assert stats.totals.bytes == sum(os.path.getsize(filename) for filename in filenames[:2])
+        assert stats.totals.lines == 17
+        assert stats.totals.hits == 16
+        assert stats.totals.tokens >= stats.totals.hits
+        # Each distinct word of a file is looked up once.
+        assert stats.totals.hits <= stats.totals.lookups < stats.totals.tokens
+        assert [filename for filename, _ in stats.failed] == [filenames[2]]
+        assert stats.skipped == [(filenames[3], "directory")]
+        slowest = stats.slowest_files()
+        assert sorted(filename for _, filename in slowest) == sorted(map(str, filenames[:2]))
+        assert slowest[0][0] >= slowest[1][0]
+        assert all(stats.phases[phase] > 0 for phase in ("read", "match", "output"))
+        report = io.StringIO()
+        stats.write_report(report)
+        assert "hits         16\n" in report.getvalue()
+
+    def test_stats_of_undecodable_and_mapped_files(self, tmp_path, monkeypatch):
+        ms = MisspellingDetector()
+        stats = ScanStats()
+        ms.set_hooks(stats)
+        broken = tmp_path / "broken.txt"
+        broken.write_bytes(b"teh\n\xff\nyuo\n")
+        assert ms.check(broken) == ([], [])
+        assert stats.skipped == [(broken, "not valid UTF-8")]
+
+        from src.misspelling_lib import misspelling_checker
+
+        monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1)
+        mapped = tmp_path / "mapped.txt"
+        mapped.write_text("teh\nok\nyuo", encoding="utf-8")
+        assert len(ms.check(mapped)[1]) == 2
+        assert stats.files == 2
+        assert stats.totals.hits == 2
+        assert stats.totals.lines == 3
+        assert stats.totals.bytes == 20
+
+    def test_no_hooks(self):
+        ms = MisspellingDetector()
+        ms.set_hooks(ScanStats())
+        ms.set_hooks(None)
+        assert ms.check(BASE_PATH / "test_assets/nine_misspellings.c")[1][0].word == "yrea"
+
+
+class TestAsyncApi:
+    FILENAMES = [
+        BASE_PATH / "test_assets/nine_misspellings.c",
+        BASE_PATH / "test_assets/missing_source.c",
+        BASE_PATH / "test_assets/various_spellings.c",
+    ]
+
+    def test_acheck(self):
+        ms = MisspellingDetector()
+        assert asyncio.run(ms.acheck(self.FILENAMES[0])) == ms.check(self.FILENAMES[0])
+
+    def test_acheck_many(self):
+        ms = MisspellingDetector()
+
+        async def filenames():
+            for filename in self.FILENAMES:
+                yield filename
+
+        async def check_all(filenames):
+            return [result async for result in ms.acheck_many(filenames, concurrency=2)]
+
+        for results in (asyncio.run(check_all(self.FILENAMES)), asyncio.run(check_all(filenames()))):
+            assert [filename for filename, _, _ in results] == self.FILENAMES
+            assert [len(errors) for _, errors, _ in results] == [0, 1, 0]
+            assert [result for _, _, result in results] == [ms.check(filename)[1] for filename in self.FILENAMES]
+
+    def test_acheck_many_concurrency_and_cancellation(self, monkeypatch):
+        ms = MisspellingDetector()
+        lock = threading.Lock()
+        running, started = [0], []
+        peak = [0]
+        check = ms.check
+
+        def slow_check(filename):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                started.append(filename)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return check(filename)
+
+        monkeypatch.setattr(ms, "check", slow_check)
+        filenames = self.FILENAMES[:1] * 20
+
+        async def first_result():
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = ms.acheck_many(filenames, concurrency=3, executor=executor)
+                first = await results.__anext__()
+                await results.aclose()
+                return first
+
+        assert asyncio.run(first_result())[2][0].word == "yrea"
+        assert peak[0] <= 3
+        assert len(started) < len(filenames)
+
+        with pytest.raises(ValueError):
+            asyncio.run(ms.acheck_many(filenames, concurrency=0).__anext__())
+
+
+class TestMisspellingServer:
+    def test_requests(self):
+        server = MisspellingServer(MisspellingDetector)
+        assert server.handle({"id": 1, "command": "ping"}) == {"id": 1, "pong": True}
+        assert server.handle({"id": 2, "text": "Teh cat\nyuo", "name": "message"}) == {
+            "id": 2,
+            "results": [
+                {"filename": "message", "line": 1, "column": 1, "word": "Teh", "suggestions": ["The"]},
+                {"filename": "message", "line": 2, "column": 1, "word": "yuo", "suggestions": ["you"]},
+            ],
+            "errors": [],
+        }
+        response = server.handle({"paths": ["test_assets/nine_misspellings.c", "missing.c"], "cwd": str(BASE_PATH)})
+        assert response["results"][0] == {
+            "filename": "test_assets/nine_misspellings.c",
+            "line": 1,
+            "column": 5,
+            "word": "yrea",
+            "suggestions": ["year"],
+        }
+        assert len(response["results"]) == 9
+        assert len(response["errors"]) == 1
+        assert "error" in server.handle({"id": 3})
+        assert json.loads(server.handle_line(b"[1]"))["error"].startswith("Invalid request")
+        for request in ({"paths": [1]}, {"paths": ["a\u0000b"]}, {"paths": ["a"], "cwd": 1}):
+            assert "error" in server.handle(request)
+            assert "error" in json.loads(server.handle_line(json.dumps(request).encode()))
+
+    def test_failed_request_does_not_stop_the_server(self, monkeypatch):
+        server = MisspellingServer(MisspellingDetector)
+        monkeypatch.setattr(server, "handle", lambda request: 1 / 0)
+        response = json.loads(server.handle_line(b'{"id": 4, "text": "teh"}'))
+        assert response["id"] == 4
+        assert "ZeroDivisionError" in response["error"]
+
+    def test_dictionary_is_reloaded_when_it_changes(self, tmp_path):
+        misspelling_file = tmp_path / "misspellings.txt"
+        misspelling_file.write_text("teh the\n", encoding="utf-8")
+        server = MisspellingServer(lambda: MisspellingFileDetector(misspelling_file))
+        assert [r["word"] for r in server.handle({"text": "teh yuo"})["results"]] == ["teh"]
+        misspelling_file.write_text("teh the\nyuo you\n", encoding="utf-8")
+        assert [r["word"] for r in server.handle({"text": "teh yuo"})["results"]] == ["teh", "yuo"]
+
+
+class TestMatchingEngines:
+    @staticmethod
+    def _differential_lines():
+        ms = MisspellingDetector()
+        rng = random.Random(4)
+        words = list(ms._misspelling_dict) + ["the", "good", "HTML", "ok", "écrit", "Zebra"]
+        separators = [" ", "_", ".", "-", "2", "", "'", "\t", "é", "X"]
+        lines = []
+        for _ in range(2000):
+            parts = []
+            for _ in range(rng.randint(1, 8)):
+                word = rng.choice(words)
+                word = rng.choice([word, word.capitalize(), word.upper(), word[1:], word + "s"])
+                parts.extend([word, rng.choice(separators)])
+            lines.append("".join(parts))
+        return ms._misspelling_dict, lines
+
+    def test_columns_of_the_words_found(self):
+        misspelling_dict, lines = self._differential_lines()
+        tokenizer = TokenizerMatcher(misspelling_dict)
+        for line in lines:
+            assert list(tokenizer.find_word_columns(line)) == list(word_columns(line, tokenizer.find_words(line))), line
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            MisspellingDetector(engine="missing")
+
+
+class TestMappedScan:
+    @pytest.fixture
+    def mapped(self, monkeypatch):
+        from src.misspelling_lib import misspelling_checker
+
+        monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1)
+        monkeypatch.setattr(misspelling_checker, "MMAP_BLOCK_SIZE", 64)
+
+    def test_mapped_scan_matches_text_scan(self, tmp_path, monkeypatch):
+        from src.misspelling_lib import misspelling_checker
+
+        _, lines = TestMatchingEngines._differential_lines()
+        source = tmp_path / "source.c"
+        source.write_text("\r\n".join(lines[:200]) + "\nteh # ignore-misspelling\n\nyuo", encoding="utf-8")
+        ms = MisspellingDetector()
+        for filename in (source, BASE_PATH / "test_assets/various_spellings.c"):
+            monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1 << 40)
+            expected = ms.check(filename)
+            monkeypatch.setattr(misspelling_checker, "MMAP_MIN_SIZE", 1)
+            monkeypatch.setattr(misspelling_checker, "MMAP_BLOCK_SIZE", 64)
+            assert ms.check(filename) == expected
+            # Forgetting the runs seen doesn't change the results either.
+            monkeypatch.setattr(misspelling_checker, "MMAP_RUN_MEMO_SIZE", 2)
+            assert ms.check(filename) == expected
+
+    def test_undecodable_line_is_skipped(self, tmp_path, mapped):
+        source = tmp_path / "source.c"
+        source.write_bytes(b"teh\n\xff yuo\nzeebra\n")
+        assert MisspellingDetector().check(source)[1] == [(source, 1, "teh", 1), (source, 3, "zeebra", 1)]
+
+    def test_lone_carriage_returns(self, tmp_path, mapped):
+        source = tmp_path / "source.c"
+        source.write_bytes(b"teh\ryuo\n")
+        assert MisspellingDetector().check(source)[1] == [(source, 1, "teh", 1), (source, 2, "yuo", 1)]
+
+
+class TestMisspellingIndex:
+    def test_index_matches_json_source(self, tmp_path):
+        source = BASE_PATH / "test_assets/nine_misspellings.json"
+        index = MisspellingIndex.open(compile_index([source], tmp_path / "nine.msidx"))
+        with open(source, encoding="utf-8") as f:
+            assert dict(index.items()) == json.load(f)
+        assert "zeebra" in index
+        assert "zebra" not in index
+        assert index.get("zebra") is None
+
+    def test_index_from_text_and_wikipedia_sources(self, tmp_path):
+        wikipedia = tmp_path / "wikipedia.txt"
+        wikipedia.write_text("abotu->about\nabouta->about a, about\n", encoding="utf-8")
+        index = MisspellingIndex.open(
+            compile_index([BASE_PATH / "test_assets/small_msl.txt", wikipedia], tmp_path / "mixed.msidx")
+        )
+        assert dict(index.items()) == {
+            "abotu": ["about"],
+            "abouta": ["about a", "about"],
+            "bar": ["beyond all repair"],
+            "foo": ["fouled up"],
+        }
+
+    def test_broken_index(self, tmp_path):
+        (tmp_path / "broken.msidx").write_bytes(b"MSPI garbage")
+        with pytest.raises(ValueError):
+            MisspellingIndex.open(tmp_path / "broken.msidx")
+
+    def test_load_index_rebuilds_when_source_changes(self, tmp_path):
+        source = tmp_path / "words.json"
+        source.write_text('{"teh": ["the"]}', encoding="utf-8")
+        packaged = compile_index([source], tmp_path / "packaged.msidx")
+        assert load_index([source], packaged_index=packaged, cache_dir=tmp_path / "cache")._path == packaged
+        assert not (tmp_path / "cache").exists()
+
+        source.write_text('{"teh": ["the"], "yuo": ["you"]}', encoding="utf-8")
+        index = load_index([source], packaged_index=packaged, cache_dir=tmp_path / "cache")
+        assert index._path.parent == tmp_path / "cache"
+        assert dict(index.items()) == {"teh": ["the"], "yuo": ["you"]}
+
+    def test_index_can_be_pickled(self):
+        index = MisspellingDetector()._misspelling_dict
+        assert pickle.loads(pickle.dumps(index))["teh"] == ["the"]
+
+
+class TestMisspellingLookup:
+    def test_suggestions_match_the_dictionary(self):
+        misspelling_dict = MisspellingDetector()._misspelling_dict
+        lookup = MisspellingLookup(misspelling_dict)
+        for word in random.Random(0).sample(sorted(lookup), 500):
+            corrections = set(misspelling_dict.get(word, [])) | set(misspelling_dict.get(word.lower(), []))
+            assert list(lookup[word]) == sorted(same_case(word, w) for w in corrections)
+
+    def test_case_variants(self):
+        lookup = MisspellingLookup({"teh": ["the"], "étré": ["être"], "Yuo": ["You"]})
+        assert lookup["teh"] == ("the",)
+        assert lookup["Teh"] == ("The",)
+        assert lookup["ÉtrÉ"] == ("Être",)
+        assert "éTré" not in lookup
+        assert "yuo" not in lookup
+        assert "TEH" not in lookup
+        assert lookup.suggestions("TEH") == ("The",)
+        assert lookup.suggestions("the") == ()
+
+    def test_suggestions_are_only_computed_once(self):
+        lookup = MisspellingLookup({"teh": ["the"], "adn": ["and", "add"]})
+        assert lookup.suggestions("Adn") is lookup.suggestions("Adn")
+        assert lookup.quoted_suggestions("Adn") == '"Add","And"'
+        assert lookup.quoted_suggestions("Adn") is lookup.quoted_suggestions("Adn")
+
+    def test_nothing_is_computed_up_front(self):
+        misspelling_dict = MisspellingDetector()._misspelling_dict
+        lookup = MisspellingLookup(misspelling_dict)
+        assert "Teh" in lookup
+        assert not lookup._suggestions
+        assert lookup["Teh"] == ("The",)
+        assert list(lookup._suggestions) == ["Teh"]
+        assert len(lookup) == len(set(lookup))
+
+    def test_detector_suggestions(self):
+        ms = MisspellingDetector()
+        assert ms.get_suggestions("Teh") == ["The"]
+        assert ms.get_suggestions("the") == []
+
+
+class TestScanCache:
+    def test_unchanged_file_is_not_scanned_again(self, tmp_path, monkeypatch):
+        source = tmp_path / "source.c"
+        source.write_text("teh zeebra\nYuo\n", encoding="utf-8")
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        assert ms.check(source) == ([], [(source, 1, "teh", 1), (source, 1, "zeebra", 5), (source, 2, "Yuo", 1)])
+
+        def fail(filename, stats=None):
+            raise AssertionError("scanned again")
+
+        monkeypatch.setattr(ms, "_scan_file", fail)
+        assert ms.check(source) == ([], [(source, 1, "teh", 1), (source, 1, "zeebra", 5), (source, 2, "Yuo", 1)])
+        # Same content at another path or with another mtime is a hit as well.
+        copy = tmp_path / "copy.c"
+        copy.write_bytes(source.read_bytes())
+        assert ms.check(copy)[1][0] == (copy, 1, "teh", 1)
+
+    def test_changed_file_is_scanned_again(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("teh\n", encoding="utf-8")
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        assert len(ms.check(source)[1]) == 1
+        source.write_text("teh yuo\n", encoding="utf-8")
+        assert len(ms.check(source)[1]) == 2
+
+    def test_cache_is_specific_to_the_dictionary(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("teh foo\n", encoding="utf-8")
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        file_ms = MisspellingFileDetector(BASE_PATH / "test_assets/small_msl.txt")
+        file_ms.enable_scan_cache(tmp_path / "cache")
+        assert ms.check(source)[1] == [(source, 1, "teh", 1)]
+        assert file_ms.check(source)[1] == [(source, 1, "foo", 5)]
+
+    def test_cache_is_specific_to_the_file_type(self, tmp_path):
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        ms.restrict_to_comments_and_strings()
+        source, prose = tmp_path / "a.py", tmp_path / "a.md"
+        for path in (source, prose):
+            path.write_text("teh = 1  # yuo\n", encoding="utf-8")
+        assert [result.word for result in ms.check(source)[1]] == ["yuo"]
+        assert [result.word for result in ms.check(prose)[1]] == ["teh", "yuo"]
+
+        ms.restrict_to_comments_and_strings(False)
+        minified, script = tmp_path / "b.min.js", tmp_path / "b.js"
+        for path in (minified, script):
+            path.write_text("var teh;\n", encoding="utf-8")
+        assert ms.check(minified)[1] == []
+        assert len(ms.check(script)[1]) == 1
+
+    def test_file_skipped_by_name_is_not_read(self, tmp_path, monkeypatch):
+        ms = MisspellingDetector()
+        cache = ms.enable_scan_cache(tmp_path / "cache")
+        archive = tmp_path / "archive.zip"
+        archive.write_bytes(b"teh\n" * 100)
+
+        def fail(filename, variant=""):
+            raise AssertionError("read for the cache")
+
+        monkeypatch.setattr(cache, "get", fail)
+        assert ms.check(archive) == ([], [])
+
+    def test_missing_file_with_cache(self, tmp_path):
+        ms = MisspellingDetector()
+        ms.enable_scan_cache(tmp_path / "cache")
+        errors, _ = ms.check(BASE_PATH / "test_assets/missing_source.c")
+        assert errors
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        ms = MisspellingDetector()
+        cache = ms.enable_scan_cache(tmp_path / "cache", max_size=1)
+        sources = []
+        for number in range(3):
+            sources.append(tmp_path / f"source{number}.c")
+            sources[-1].write_text(f"teh {number}\n", encoding="utf-8")
+            ms.check(sources[-1])
+        cache.max_size = sum(f.stat().st_size for f in (tmp_path / "cache").rglob("*.json")) - 1
+        cache.prune()
+        assert len(list((tmp_path / "cache").rglob("*.json"))) < 6
+
+
+def git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+class TestGitChanges:
+    @pytest.fixture
+    def repository(self, tmp_path, monkeypatch):
+        git("init", "-q", cwd=tmp_path)
+        (tmp_path / "old.c").write_text("teh\ngood\nyuo\n", encoding="utf-8")
+        (tmp_path / "other.c").write_text("zeebra\n", encoding="utf-8")
+        git("add", ".", cwd=tmp_path)
+        git("commit", "-q", "-m", "first", cwd=tmp_path)
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_parse_diff(self):
+        from src.misspelling_lib.utils.git import parse_diff
+
+        diff = b"""+++ b/a.c
+@@ -1 +1 @@
+@@ -5,0 +6,2 @@
++++ /dev/null
+@@ -1,3 +0,0 @@
++++ b/b.c
+@@ -2 +1,0 @@
+"""
+        assert parse_diff(diff) == {"a.c": {1, 6, 7}}
+
+    def test_staged_changes_are_read_from_the_index(self, repository):
+        (repository / "old.c").write_text("teh\ngood zeebra\nyuo\n", encoding="utf-8")
+        (repository / "new.c").write_text("withdrawl\n", encoding="utf-8")
+        git("add", "old.c", "new.c", cwd=repository)
+        (repository / "new.c").write_text("unstaged\n", encoding="utf-8")
+
+        changes = collect_changes(staged=True)
+        assert sorted(changes) == [Path("new.c"), Path("old.c")]
+        assert changes[Path("new.c")].content == b"withdrawl\n"
+
+        ms = MisspellingDetector()
+        ms.restrict_to_changes(changes)
+        assert [ms.check(f)[1] for f in changes] == [
+            [(Path("new.c"), 1, "withdrawl", 1)],
+            [(Path("old.c"), 2, "zeebra", 6)],
+        ]
+
+    def test_working_tree_changes_since_a_revision(self, repository):
+        (repository / "other.c").write_text("zeebra\nteh\n", encoding="utf-8")
+        changes = collect_changes(diff="HEAD")
+        assert list(changes) == [Path("other.c")]
+        assert changes[Path("other.c")] == (frozenset([2]), None)
+
+    @pytest.mark.parametrize("staged", [False, True])
+    def test_paths_with_spaces(self, repository, staged):
+        (repository / "with space.c").write_text("teh\n", encoding="utf-8")
+        git("add", "with space.c", cwd=repository)
+        changes = collect_changes(diff="HEAD", staged=staged)
+        assert list(changes) == [Path("with space.c")]
+        ms = MisspellingDetector()
+        ms.restrict_to_changes(changes)
+        assert ms.check(Path("with space.c"))[1] == [(Path("with space.c"), 1, "teh", 1)]
+
+    @pytest.mark.parametrize("setting", ["diff.noprefix", "diff.mnemonicPrefix"])
+    def test_diff_prefix_settings_are_ignored(self, repository, setting):
+        git("config", setting, "true", cwd=repository)
+        (repository / "other.c").write_text("zeebra\nteh\n", encoding="utf-8")
+        assert list(collect_changes(diff="HEAD")) == [Path("other.c")]
+
+    def test_revision_range_is_read_from_its_end(self, repository):
+        (repository / "other.c").write_text("yuo\n", encoding="utf-8")
+        git("commit", "-q", "-a", "-m", "second", cwd=repository)
+        (repository / "other.c").write_text("good\n", encoding="utf-8")
+        changes = collect_changes(diff="HEAD~1..HEAD")
+        assert changes == {Path("other.c"): (frozenset([1]), b"yuo\n")}
+
+    def test_outside_of_a_repository(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+        with pytest.raises(IOError):
+            collect_changes(staged=True)
+
 
 class TestUtilityFunction:
     def test_same_case(self):
@@ -87,5 +1009,104 @@ class TestUtilityFunction:
     def test_split_words_with_camel_case_single_letter(self):
         assert ["A", "Fair", "Market"] == split_words("AFairMarket")
 
+    def test_get_a_line(self, tmp_path, monkeypatch):
+        source = tmp_path / "source.c"
+        source.write_bytes(b"one\r\ntwo teh \rthree\nfour")
+        assert [get_a_line(source, line_ct) for line_ct in (4, 2, 1, 3)] == ["four", "two teh", "one", "three"]
+        with pytest.raises(IndexError):
+            get_a_line(source, 5)
+
+        # Only the line is read once the offsets are known.
+        read = []
+        monkeypatch.setattr(
+            "src.misspelling_lib.utils.words.array",
+            lambda *args: read.append(args) or array.array(*args),
+        )
+        assert get_a_line(source, 2) == "two teh"
+        assert read == []
+        source.write_bytes(b"teh\nthe end\n")
+        assert get_a_line(source, 2) == "the end"
+        assert len(read) == 1
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "oneTwoThree_four five",
+            "the%big$cat",
+            "  AFairMarket 42x",
+            "Ünïcode ÉtéFoo",
+            "\u212aelvin ǅungla",
+            "teh\u0663 x²y",
+            "",
+        ],
+    )
+    def test_tokenize_matches_split_words(self, line):
+        assert tokenize(line) == [word for word in split_words(line) if word]
+        assert [line[column - 1 : column - 1 + len(word)] for column, word in tokenize_with_columns(line)] == tokenize(
+            line
+        )
+
+    def test_tokenize_with_columns(self):
+        assert list(tokenize_with_columns("if tehValue: 1")) == [(1, "if"), (4, "teh"), (7, "Value")]
+
     def test_normalize(self):
         assert normalize('"alpha".') == "alpha"
+
+    def test_expand_directories_is_lazy(self):
+        files = expand_directories([BASE_PATH.parent / "src", BASE_PATH / "test_assets/missing.c"])
+        assert next(files).is_file()
+        assert list(files)[-1] == BASE_PATH / "test_assets/missing.c"
+
+    @pytest.mark.parametrize("threads", [0, 3])
+    def test_expand_directories(self, tmp_path, threads):
+        for directory in ("src/deep/er", "src/node_modules", "src/pkg.egg-info", "src/bin", "src/cabinet"):
+            (tmp_path / directory).mkdir(parents=True)
+            (tmp_path / directory / "main.c").write_text("teh\n", encoding="utf-8")
+        (tmp_path / "src/notes.txt").write_text("teh\n", encoding="utf-8")
+        # A link looping back to a parent is only walked once.
+        os.symlink(tmp_path / "src", tmp_path / "src/deep/loop")
+        files = list(expand_directories([tmp_path / "src", tmp_path / "src/cabinet/main.c"], threads=threads))
+        assert sorted(files) == [
+            tmp_path / "src/cabinet/main.c",
+            tmp_path / "src/cabinet/main.c",
+            tmp_path / "src/deep/er/main.c",
+        ]
+        assert files == list(expand_directories([tmp_path / "src", tmp_path / "src/cabinet/main.c"]))
+
+    def test_ignore_file(self):
+        ignore_file = IgnoreFile(["# generated", "*.min.js", "/out/", "docs/**/api", "!keep.min.js", r"\#notes", ""])
+        assert ignore_file.match("app.min.js", False)
+        assert ignore_file.match("web/static/app.min.js", False)
+        assert ignore_file.match("web/keep.min.js", False) is False
+        assert ignore_file.match("out", True)
+        assert ignore_file.match("out", False) is None
+        assert ignore_file.match("web/out", True) is None
+        assert ignore_file.match("docs/api", True)
+        assert ignore_file.match("docs/v1/v2/api", True)
+        assert ignore_file.match("#notes", False)
+        assert ignore_file.match("app.js", False) is None
+
+    @pytest.mark.parametrize("threads", [0, 2])
+    def test_expand_directories_prunes_ignored_files(self, tmp_path, threads, monkeypatch):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("generated/\n*.log\n", encoding="utf-8")
+        for filename in ("src/main.c", "src/debug.log", "src/vendor/lib.c", "src/vendor/own.c", "generated/x.c"):
+            (tmp_path / filename).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / filename).write_text("teh\n", encoding="utf-8")
+        (tmp_path / "src/.gitignore").write_text("vendor/*\n", encoding="utf-8")
+        (tmp_path / "src/.misspellingignore").write_text("!vendor/own.c\n", encoding="utf-8")
+        listed = []
+        scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path: listed.append(Path(path)) or scandir(path))
+
+        assert sorted(expand_directories([tmp_path], threads=threads)) == [
+            tmp_path / "src/main.c",
+            tmp_path / "src/vendor/own.c",
+        ]
+        # Ignored directories aren't even listed.
+        assert tmp_path / "generated" not in listed
+        # The ignore files of the parent directories apply as well, but not to the files given.
+        files = list(expand_directories([tmp_path / "src", tmp_path / "generated/x.c"]))
+        assert sorted(files[:-1]) == [tmp_path / "src/main.c", tmp_path / "src/vendor/own.c"]
+        assert files[-1] == tmp_path / "generated/x.c"
+        assert len(list(expand_directories([tmp_path], ignore_files=False))) == 5
@@ -1,9 +1,60 @@
+import json
 import os
 import subprocess
+import sys
+import time
 from pathlib import Path
 
 TEST_BASE_DIR = Path(__file__).parents[0]
 CLI = Path(__file__).parents[1] / "src/misspelling_lib/misspellings.py"
+# Generous bounds on the time spent importing, as a multiple of the imports of
+# a bare interpreter measured in the same test so they hold on any machine. A
+# regression is usually a heavy dependency imported again, caught by name too.
+IMPORT_BUDGET_RATIO = 15
+CLI_IMPORT_BUDGET_RATIO = 25
+HEAVY_MODULES = ("rich", "tap", "concurrent.futures", "multiprocessing", "json", "tempfile", "hashlib")
+
+
+def import_times(*args):
+    """
+    Return the cumulative import time in microseconds of each module imported
+    by python args, and the total time spent importing.
+    """
+    p = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=TEST_BASE_DIR.parent / "src",
+        stderr=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    times, total = {}, 0
+    for line in p.stderr.decode().splitlines()[1:]:
+        if line.startswith("import time:"):
+            _, cumulative, module = line.split("|")
+            times[module.strip()] = int(cumulative)
+            if not module.startswith("  "):
+                total += int(cumulative)
+    return times, total
+
+
+def best_import_time(*args, repeat=3):
+    """Return the lowest total import time of a few runs of python args, the least disturbed one."""
+    return min(import_times(*args)[1] for _ in range(repeat))
+
+
+class TestStartup:
+    def test_library_import_is_light(self):
+        args = ("-c", "import misspelling_lib; misspelling_lib.MisspellingDetector()")
+        times, _ = import_times(*args)
+        assert "misspelling_lib.misspelling_checker" in times
+        assert not [m for m in times if m.split(".")[0] in HEAVY_MODULES or m.startswith(HEAVY_MODULES)]
+        assert best_import_time(*args) < IMPORT_BUDGET_RATIO * best_import_time("-c", "pass")
+
+    def test_cli_import_is_light(self):
+        args = (str(CLI), str(TEST_BASE_DIR / "test_assets/nine_misspellings.c"))
+        times, _ = import_times(*args)
+        assert "tap" in times
+        assert not [m for m in times if m.startswith(("rich", "concurrent.futures", "multiprocessing"))]
+        assert best_import_time(*args) < CLI_IMPORT_BUDGET_RATIO * best_import_time("-c", "pass")
 
 
 class TestCli:
@@ -181,3 +232,245 @@ class TestCli:
         assert error_output.decode() == ""
         assert len(output.decode().split("\n")) == 10
         assert p.returncode == 2
+
+    def test_flag_jobs(self):
+        files = ["test_assets/various_spellings.c", "test_assets/nine_misspellings.c"]
+        outputs = []
+        for jobs in ("1", "2"):
+            p = subprocess.Popen(
+                [CLI, "--jobs", jobs, *files],
+                cwd=TEST_BASE_DIR,
+                stderr=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            (output, error_output) = p.communicate()
+            assert error_output.decode() == ""
+            assert p.returncode == 2
+            outputs.append(output.decode())
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0].split("\n")) == 17
+
+    def test_flag_export_file(self, tmp_path):
+        export_file = tmp_path / "export.txt"
+        p = subprocess.Popen(
+            [CLI, "--export-file", export_file, "test_assets/various_spellings.c"],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert len(output.decode().split("\n")) == 8
+        assert export_file.read_text(encoding="utf-8") == output.decode()
+
+    def test_flag_fix(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("Teh zeebra\nachive\n", encoding="utf-8")
+        p = subprocess.Popen([CLI, "--fix", "--dry-run", source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert "+The zebra\n" in output.decode()
+        assert source.read_text(encoding="utf-8") == "Teh zeebra\nachive\n"
+
+        p = subprocess.Popen([CLI, "--fix", source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        # "achive" has several suggestions, so it's left to correct by hand.
+        assert p.returncode == 2
+        assert len(output.decode().splitlines()) == 3
+        assert source.read_text(encoding="utf-8") == "The zebra\nachive\n"
+
+    def test_flag_fix_comments_only(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text('int teh = 1; // teh value\nteh = "teh";\n', encoding="utf-8")
+        p = subprocess.Popen([CLI, "--fix", "--comments-only", source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 0
+        # The identifiers are left alone.
+        assert source.read_text(encoding="utf-8") == 'int teh = 1; // the value\nteh = "the";\n'
+
+    def test_flag_check_generated(self, tmp_path):
+        source = tmp_path / "app.min.js"
+        source.write_text("var teh;\n", encoding="utf-8")
+        p = subprocess.Popen([CLI, source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert p.returncode == 0
+        assert output.decode() == ""
+        p = subprocess.Popen([CLI, "--check-generated", source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert output.decode() == f'{source}:1: teh -> "the"\n'
+
+    def test_flag_fail_fast(self):
+        p = subprocess.Popen(
+            [CLI, "--fail-fast", "test_assets/nine_misspellings.c", "test_assets/various_spellings.c"],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert len(output.decode().splitlines()) == 1
+
+    def test_flag_max_file_size(self, tmp_path):
+        small, large = tmp_path / "small.txt", tmp_path / "large.txt"
+        small.write_text("teh\n", encoding="utf-8")
+        large.write_text("teh\n" * 1000, encoding="utf-8")
+        p = subprocess.Popen(
+            [CLI, "--max-file-size", "1", small, large], stderr=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        (output, error_output) = p.communicate()
+        assert p.returncode == 2
+        assert output.decode() == f'{small}:1: teh -> "the"\n'
+        assert (
+            error_output.decode() == f"ERROR: {large}: too large, skipped as 4000 bytes is over the 1024 bytes limit\n"
+        )
+
+    def test_flag_comments_only(self, tmp_path):
+        source = tmp_path / "source.c"
+        source.write_text("int teh; // zeebra\n", encoding="utf-8")
+        p = subprocess.Popen([CLI, "--comments-only", source], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert output.decode() == f'{source}:1: zeebra -> "zebra"\n'
+
+    def test_flag_count(self):
+        p = subprocess.Popen(
+            [CLI, "--count", "test_assets/various_spellings.c", "test_assets/nine_misspellings.c"],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        assert "      9 test_assets/nine_misspellings.c" in output.decode()
+        assert output.decode().endswith("Total: 16 misspellings in 2 files\n")
+
+    def test_flag_output_format(self):
+        p = subprocess.Popen(
+            [CLI, "--output-format", "jsonl", "test_assets/various_spellings.c"],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert p.returncode == 2
+        records = [json.loads(line) for line in output.decode().splitlines()]
+        assert len(records) == 7
+        assert records[5] == {
+            "filename": "test_assets/various_spellings.c",
+            "line": 6,
+            "column": 20,
+            "word": "withdrawl",
+            "suggestions": ["withdraw", "withdrawal"],
+        }
+
+    def test_flag_stats(self):
+        p = subprocess.Popen(
+            [
+                CLI,
+                "--stats",
+                "--stats-slowest",
+                "1",
+                "test_assets/various_spellings.c",
+                "test_assets/nine_misspellings.c",
+            ],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert p.returncode == 2
+        assert len(output.decode().split("\n")) == 17
+        report = error_output.decode()
+        for phase in ("dictionary", "walk", "read", "match", "output"):
+            assert f"\n  {phase} " in report
+        assert "  files        2 (0 from the cache)\n" in report
+        assert "  hits         16\n" in report
+        assert report.split("Slowest files:\n")[1].count("\n") == 1
+
+    def test_flag_serve(self):
+        p = subprocess.Popen(
+            [CLI, "--serve"],
+            cwd=TEST_BASE_DIR,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stdin=subprocess.PIPE,
+        )
+        requests = '{"id": 1, "paths": ["test_assets/nine_misspellings.c"]}\n{"id": 2, "text": "teh"}\n'
+        (output, error_output) = p.communicate(input=requests.encode("utf8"))
+        assert error_output.decode() == ""
+        assert p.returncode == 0
+        responses = [json.loads(line) for line in output.decode().splitlines()]
+        assert [response["id"] for response in responses] == [1, 2]
+        assert len(responses[0]["results"]) == 9
+        assert responses[1]["results"][0]["suggestions"] == ["the"]
+
+    def test_flag_socket(self, tmp_path):
+        socket_path = tmp_path / "misspellings.sock"
+        files = ["test_assets/various_spellings.c", "test_assets/nine_misspellings.c"]
+        expected = subprocess.run([CLI, *files], cwd=TEST_BASE_DIR, stdout=subprocess.PIPE).stdout.decode()
+        # Without a daemon the files are checked by the client.
+        p = subprocess.run([CLI, "--socket", socket_path, *files], cwd=TEST_BASE_DIR, stdout=subprocess.PIPE)
+        assert (p.returncode, p.stdout.decode()) == (2, expected)
+
+        server = subprocess.Popen([CLI, "--serve", "--socket", socket_path], cwd=TEST_BASE_DIR)
+        try:
+            for _ in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.05)
+            p = subprocess.run([CLI, "--socket", socket_path, *files], cwd=TEST_BASE_DIR, stdout=subprocess.PIPE)
+            assert (p.returncode, p.stdout.decode()) == (2, expected)
+            p = subprocess.run(
+                [CLI, "--socket", socket_path, "test_assets/missing_source.c"],
+                cwd=TEST_BASE_DIR,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            assert p.returncode == 0
+            assert p.stderr.decode().startswith("ERROR: ")
+        finally:
+            server.terminate()
+            server.wait()
+
+    def test_flag_cache_dir(self, tmp_path):
+        outputs = []
+        for _ in range(2):
+            p = subprocess.Popen(
+                [CLI, "--cache-dir", tmp_path, "test_assets/various_spellings.c"],
+                cwd=TEST_BASE_DIR,
+                stderr=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            (output, error_output) = p.communicate()
+            assert error_output.decode() == ""
+            assert p.returncode == 2
+            outputs.append(output.decode())
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0].split("\n")) == 8
+        assert list(tmp_path.rglob("*.json"))
+
+    def test_flag_staged(self, tmp_path):
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        (tmp_path / "source.c").write_text("teh\n", encoding="utf-8")
+        subprocess.run(["git", "add", "source.c"], cwd=tmp_path, check=True)
+        (tmp_path / "source.c").write_text("teh\nyuo\n", encoding="utf-8")
+        p = subprocess.Popen(
+            [CLI, "--staged"],
+            cwd=tmp_path,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        (output, error_output) = p.communicate()
+        assert error_output.decode() == ""
+        assert output.decode() == 'source.c:1: teh -> "the"\n'
+        assert p.returncode == 2